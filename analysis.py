@@ -0,0 +1,248 @@
+import itertools
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import requests
+import xmltodict
+
+from result_store import CompactResult
+
+# ▶ 사정율 분석 코어 (Streamlit 비의존)
+# app.py 의 analyze_gongo 와 replay.py 의 일괄 재계산이 같은 코드를 쓴다.
+# 응답 본문을 가져오는 방법(fetch)만 다르다: 실시간 API 호출 또는 아카이브 재생.
+
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+# 부하 테스트 등에서 로컬 대역(mock_api.py)으로 바꿔 끼울 수 있다
+API_BASE = os.environ.get("GONGO_API_BASE", "http://apis.data.go.kr").rstrip('/')
+
+# 조회 엔드포인트 (키는 아카이브에 그대로 쓰이므로 바꾸지 않는다)
+ENDPOINTS = {
+    # 복수예가 상세
+    'prepar': '{api_base}/1230000/as/ScsbidInfoService/getOpengResultListInfoCnstwkPreparPcDetail?inqryDiv=2&bidNtceNo={gongo_nm}&bidNtceOrd=00&pageNo=1&numOfRows=15&type=json&ServiceKey={service_key}',
+    # 낙찰하한율
+    'lwlt': '{api_base}/1230000/ad/BidPublicInfoService/getBidPblancListInfoCnstwk?inqryDiv=2&bidNtceNo={gongo_nm}&pageNo=1&numOfRows=10&type=json&ServiceKey={service_key}',
+    # A값 (기초금액 상세)
+    'bsis': '{api_base}/1230000/ad/BidPublicInfoService/getBidPblancListInfoCnstwkBsisAmount?inqryDiv=2&bidNtceNo={gongo_nm}&pageNo=1&numOfRows=10&type=json&ServiceKey={service_key}',
+    # 개찰결과 (XML)
+    'opengcompt': '{api_base}/1230000/as/ScsbidInfoService/getOpengResultListInfoOpengCompt?serviceKey={service_key}&pageNo=1&numOfRows=999&bidNtceNo={gongo_nm}',
+}
+
+# 계산식에 쓰이는 기준값. 바꾼 뒤 `python replay.py` 로 아카이브 전체를 다시 계산할 수 있다.
+RATE_WINDOW = (90, 110)
+BASE_PRICE_ROW = 1  # 복수예가 중 기초금액으로 쓰는 행
+A_VALUE_COST_COLS = ['sftyMngcst','sftyChckMngcst','rtrfundNon','mrfnHealthInsrprm','npnInsrprm','odsnLngtrmrcprInsrprm','qltyMngcst']
+COMBINATION_SIZE = 4
+
+RawResponse = namedtuple('RawResponse', ['status_code', 'body'])
+
+
+class LiveFetcher:
+    """data.go.kr 를 호출하는 fetch. archive 가 주어지면 받은 응답을 그대로 보관한다."""
+
+    def __init__(self, service_key, archive=None, session=None, timeout=30):
+        self.service_key = service_key
+        self.archive = archive
+        self.session = session or requests
+        self.timeout = timeout
+
+    def __call__(self, gongo_nm, endpoint):
+        url = ENDPOINTS[endpoint].format(api_base=API_BASE, gongo_nm=gongo_nm, service_key=self.service_key)
+        res = self.session.get(url, headers=HEADERS, timeout=self.timeout)
+        raw = RawResponse(res.status_code, res.content)
+        if self.archive is not None:
+            try:
+                self.archive.put(gongo_nm, endpoint, raw)
+            except OSError:
+                pass  # 아카이브 저장 실패가 분석을 막지는 않는다
+        return raw
+
+
+def _items(data, name):
+    if 'response' not in data or 'body' not in data['response'] or 'items' not in data['response']['body'] or not data['response']['body']['items']:
+        raise ValueError(f"{name} 데이터 없음")
+
+    items_raw = data['response']['body']['items']
+    if isinstance(items_raw, dict) and 'item' in items_raw:
+        items = items_raw['item']
+    else:
+        items = items_raw
+
+    if not isinstance(items, list):
+        items = [items]
+    return items
+
+
+def is_complete(endpoint, raw):
+    """응답에 항목이 들어 있는지. 개찰 전의 복수예가/개찰결과처럼 비어 있으면 나중에 다시 받아야 한다."""
+    if raw.status_code != 200:
+        return False
+    try:
+        if endpoint == 'opengcompt':
+            data = xmltodict.parse(raw.body)
+            return bool((((data or {}).get('response') or {}).get('body') or {}).get('items'))
+        items = json.loads(raw.body).get('response', {}).get('body', {}).get('items')
+        return bool(items.get('item') if isinstance(items, dict) else items)
+    except Exception:
+        return False
+
+
+def combination_rates(sa_rates, k=COMBINATION_SIZE):
+    """복수예가 사정율 중 k개 조합 평균 (오름차순)."""
+    sa_rates = np.asarray(sa_rates, dtype=np.float64)
+    idx = np.array(list(itertools.combinations(range(len(sa_rates)), k)), dtype=np.intp).reshape(-1, k)
+    return np.sort(sa_rates[idx].mean(axis=1), kind='stable')
+
+
+def analyze_raw(gongo_nm, fetch):
+    """fetch(gongo_nm, endpoint) -> RawResponse 로 응답을 받아 사정율 분석.
+
+    반환: (CompactResult 또는 None, 오류 메시지 또는 None, 1순위 정보, 경고 메시지 목록)
+    """
+    top_bidder_info = {"name": "정보 없음", "rate": "N/A"}
+    warnings = []
+
+    try:
+        # ▶ 복수예가 상세
+        res1 = fetch(gongo_nm, 'prepar')
+        if res1.status_code != 200:
+            raise Exception(f"API 호출 실패 (복수예가): HTTP {res1.status_code}")
+        items_data1 = _items(json.loads(res1.body), "복수예가")
+
+        df1_raw = pd.json_normalize(items_data1)
+        df1 = df1_raw[['bssamt', 'bsisPlnprc']].astype('float')
+        df1['SA_rate'] = df1['bsisPlnprc'] / df1['bssamt'] * 100
+
+        # 개찰 후에는 추첨된 복수예가(drwtYn == 'Y')의 평균이 실제 예정가격 사정율이 된다
+        actual_rate = np.nan
+        if 'drwtYn' in df1_raw.columns:
+            drawn = df1.loc[df1_raw['drwtYn'].eq('Y').to_numpy(), 'SA_rate']
+            if len(drawn) == COMBINATION_SIZE:
+                actual_rate = drawn.mean()
+
+        if len(df1) > BASE_PRICE_ROW:
+            base_price = df1.iloc[BASE_PRICE_ROW]['bssamt']
+        else:
+            if not df1.empty and 'bssamt' in df1.columns:
+                base_price = df1.iloc[0]['bssamt']
+                warnings.append(f"공고번호 {gongo_nm}: 복수예가 항목이 2개 미만입니다. 첫 번째 예정가격을 기초금액으로 사용합니다.")
+            else:
+                raise ValueError("복수예가 데이터에서 유효한 기초금액을 찾을 수 없습니다.")
+
+        # ▶ 조합 평균 계산
+        if len(df1['SA_rate']) < COMBINATION_SIZE:
+            raise ValueError(f"복수예가 항목이 4개 미만입니다")
+        combo_rates = combination_rates(df1['SA_rate'])
+
+        # ▶ 낙찰하한율 조회
+        res2 = fetch(gongo_nm, 'lwlt')
+        if res2.status_code != 200:
+            raise Exception(f"API 호출 실패 (낙찰하한율): HTTP {res2.status_code}")
+        df2 = pd.json_normalize(_items(json.loads(res2.body), "낙찰하한율"))
+
+        if df2.empty or 'sucsfbidLwltRate' not in df2.columns:
+            raise ValueError(f"낙찰하한율 데이터에 'sucsfbidLwltRate' 컬럼이 없거나 비어 있습니다.")
+
+        sucsfbidLwltRate = float(df2.loc[0, 'sucsfbidLwltRate'])
+
+        # ▶ A값 계산 (경고 메시지 포함)
+        res3 = fetch(gongo_nm, 'bsis')
+        A_value = 0.0 # A값 기본값 0.0으로 설정 (실수형)
+        a_value_warning_displayed = False
+
+        if res3.status_code == 200:
+            data3 = json.loads(res3.body)
+
+            items_a_value_raw = data3.get('response', {}).get('body', {}).get('items', {})
+            items_a_value = items_a_value_raw.get('item') if isinstance(items_a_value_raw, dict) else items_a_value_raw
+
+            if items_a_value:
+                if not isinstance(items_a_value, list):
+                    items_a_value = [items_a_value]
+
+                df3 = pd.DataFrame(items_a_value)
+                valid_cost_cols = [col for col in A_VALUE_COST_COLS if col in df3.columns]
+
+                if valid_cost_cols:
+                    A_value = df3[valid_cost_cols].apply(pd.to_numeric, errors='coerce').fillna(0.0).sum(axis=1).iloc[0]
+                else:
+                    a_value_warning_displayed = True
+            else:
+                a_value_warning_displayed = True
+        else:
+            a_value_warning_displayed = True
+
+        if a_value_warning_displayed:
+            warnings.append(f"⚠️ 경고: 공고번호 {gongo_nm} - A값 데이터 없음. A값은 0으로 처리됩니다.")
+
+        # ▶ 개찰결과 (여기서 맨 첫 번째 업체가 1순위)
+        res4 = fetch(gongo_nm, 'opengcompt')
+        if res4.status_code != 200:
+            raise Exception(f"API 호출 실패 (개찰결과): HTTP {res4.status_code}")
+
+        # XML 응답을 JSON으로 변환
+        data4 = json.loads(json.dumps(xmltodict.parse(res4.body)))
+
+        if 'response' not in data4 or 'body' not in data4['response'] or 'items' not in data4['response']['body'] or not data4['response']['body']['items'] or 'item' not in data4['response']['body']['items']:
+            df4 = pd.DataFrame() # 개찰 결과 데이터가 없으면 빈 DataFrame
+        else:
+            items = data4['response']['body']['items']['item']
+            if not isinstance(items, list):
+                items = [items]
+            df4 = pd.DataFrame(items)
+            # 개찰 순위: opengRank 가 없으면 응답 순서 (맨 첫 번째 업체가 1순위)
+            df4['rank'] = pd.to_numeric(df4['opengRank'], errors='coerce') if 'opengRank' in df4.columns else np.nan
+            df4['rank'] = df4['rank'].fillna(pd.Series(np.arange(1, len(df4) + 1), index=df4.index)).astype(int)
+            if 'prcbdrBizno' not in df4.columns:
+                df4['prcbdrBizno'] = ''
+            df4['bidprcAmt'] = pd.to_numeric(df4['bidprcAmt'], errors='coerce')
+            df4 = df4.dropna(subset=['bidprcAmt'])
+
+        if not df4.empty:
+            top_bidder_name = df4.iloc[0]['prcbdrNm']
+
+            if sucsfbidLwltRate != 0 and base_price != 0:
+                # 사정율 계산식: ((입찰금액 - A값) * 100 / 낙찰하한율) + A값) * 100 / 기초금액
+                df4['rate'] = (((df4['bidprcAmt'] - A_value) * 100) / sucsfbidLwltRate + A_value) * 100 / base_price
+            else:
+                df4['rate'] = np.nan
+
+            df4 = df4.drop_duplicates(subset=['rate']).copy()
+            df4 = df4[(df4['rate'] >= RATE_WINDOW[0]) & (df4['rate'] <= RATE_WINDOW[1])].copy()
+            df4 = df4[['prcbdrNm', 'prcbdrBizno', 'rank', 'rate']].rename(columns={'prcbdrNm': '업체명', 'prcbdrBizno': '사업자번호'})
+
+            top_bidder_rate_row = df4[df4['업체명'] == top_bidder_name]
+            if not top_bidder_rate_row.empty:
+                top_bidder_info = {
+                    "name": top_bidder_name,
+                    "rate": round(top_bidder_rate_row.iloc[0]['rate'], 5)
+                }
+            else:
+                 top_bidder_info = {"name": top_bidder_name, "rate": "범위 외"}
+        else:
+            top_bidder_info = {"name": "개찰 결과 없음", "rate": "N/A"}
+
+        # 조합 사정율과 개찰 결과 사정율을 병합 (세션에는 압축 표현으로 보관)
+        result = CompactResult.build(
+            gongo_nm,
+            combo_rates=combo_rates,
+            bidder_names=df4.get('업체명', pd.Series(dtype=object)),
+            bidder_rates=df4.get('rate', pd.Series(dtype=float)),
+            top_bidder=top_bidder_info,
+            base_price=base_price,
+            lwlt_rate=sucsfbidLwltRate,
+            a_value=A_value,
+            actual_rate=actual_rate,
+            bidder_biznos=df4.get('사업자번호', pd.Series(dtype=object)).fillna(''),
+            bidder_ranks=df4.get('rank', pd.Series(dtype=int)),
+        )
+
+        return result, None, top_bidder_info, warnings
+
+    except ValueError as ve:
+        return None, f"⚠️ 경고: 공고번호 {gongo_nm} - {ve}", top_bidder_info, warnings
+    except Exception as e:
+        return None, f"❌ 오류 발생: 공고번호 {gongo_nm} - {e}", top_bidder_info, warnings
@@ -1,13 +1,21 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import requests
-import itertools
-import json
-import xmltodict
 from datetime import datetime
 import re
 import io 
+import sqlite3
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from analysis import LiveFetcher, analyze_raw
+from archive import CachedFetcher, ResponseArchive
+from arrow_frames import bidder_table, combo_table, display_table, merge_tables, notice_tables, to_csv_bytes, to_pandas, to_parquet_bytes
+from bidder_index import BidderIndex
+from optimizer import optimize_bid
+from rate_index import rate_index_for
+from result_store import ResultHolder, ResultStore
 
 st.set_page_config(layout="wide")
 st.title("🏗️ 1365 사정율 분석 도구")
@@ -47,9 +55,6 @@ div[data-testid="stDataFrame"] .st-emotion-cache-16ffz97:first-child {
 """, unsafe_allow_html=True)
 
 
-display_width = st.selectbox("📏 표 표시 너비 설정", ["자동(전체 너비)", "고정(좁게)"])
-use_wide = display_width == "자동(전체 너비)" 
-
 # --- Session State 초기화 및 관리 ---
 # 앱의 시작 상태를 정의
 if 'gongo_nums_input_value' not in st.session_state:
@@ -57,183 +62,336 @@ if 'gongo_nums_input_value' not in st.session_state:
 if 'analysis_completed' not in st.session_state:
     st.session_state.analysis_completed = False # 분석 완료 여부
 if 'results_by_gongo_data' not in st.session_state:
-    st.session_state.results_by_gongo_data = [] # 분석 결과 데이터 (이름 변경)
+    st.session_state.results_by_gongo_data = [] # 분석 결과 (공유 저장소의 CompactResult 참조)
 if 'errors_data' not in st.session_state:
     st.session_state.errors_data = [] # 오류 메시지
 if 'processed_gongo_nums' not in st.session_state:
     st.session_state.processed_gongo_nums = [] # 처리된 공고번호 목록
 
+# --- 세션 간 공유 결과 저장소 ---
+# 서버 프로세스당 한 벌. 세션에는 저장소에 등록된 불변 결과 객체의 참조만 남긴다.
+@st.cache_resource
+def get_result_store():
+    return ResultStore()
+
+result_store = get_result_store()
+# 이 세션이 들고 있는 결과를 저장소 메모리 집계에 알리는 표식
+if 'result_holder' not in st.session_state:
+    st.session_state.result_holder = ResultHolder()
+
+# --- 원본 응답 아카이브 ---
+# 받은 응답은 모두 아카이브에 남겨, 계산식이 바뀌면 replay.py 로 재계산한다.
+# 아카이브는 prefetch.py 가 미리 채워 두는 공유 캐시이기도 하다 (최근 응답은 API 를 다시 부르지 않는다).
+@st.cache_resource
+def get_archive():
+    return ResponseArchive()
+
+# --- 업체별 사정율 역색인 ---
+# 분석한 공고의 개찰 업체 사정율을 누적해, 업체별 이력/공동 참여 공고를 조회한다.
+@st.cache_resource
+def get_bidder_index():
+    return BidderIndex()
+
 # --- analyze_gongo 함수 정의 (최상단) ---
 @st.cache_data(ttl=3600)
 def analyze_gongo(gongo_nm):
-    top_bidder_info = {"name": "정보 없음", "rate": "N/A"}
-    
     try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
         service_key = st.secrets.get("SERVICE_KEY", None)
-        if service_key is None or not service_key.strip():
-            raise Exception("Streamlit Secrets에 'SERVICE_KEY'가 설정되지 않았거나 비어 있습니다.")
-
-        # ▶ 복수예가 상세
-        url1 = f'http://apis.data.go.kr/1230000/as/ScsbidInfoService/getOpengResultListInfoCnstwkPreparPcDetail?inqryDiv=2&bidNtceNo={gongo_nm}&bidNtceOrd=00&pageNo=1&numOfRows=15&type=json&ServiceKey={service_key}'
-        res1 = requests.get(url1, headers=headers)
-        if res1.status_code != 200:
-            raise Exception(f"API 호출 실패 (복수예가): HTTP {res1.status_code}")
-        data1 = json.loads(res1.text)
-        
-        if 'response' not in data1 or 'body' not in data1['response'] or 'items' not in data1['response']['body'] or not data1['response']['body']['items']:
-            raise ValueError(f"복수예가 데이터 없음")
-            
-        items_data1_raw = data1['response']['body']['items']
-        if isinstance(items_data1_raw, dict) and 'item' in items_data1_raw:
-            items_data1 = items_data1_raw['item']
-        else:
-            items_data1 = items_data1_raw
-            
-        if not isinstance(items_data1, list):
-            items_data1 = [items_data1]
-
-        df1 = pd.json_normalize(items_data1) 
-        df1 = df1[['bssamt', 'bsisPlnprc']].astype('float')
-        df1['SA_rate'] = df1['bsisPlnprc'] / df1['bssamt'] * 100
-        
-        if len(df1) > 1:
-            base_price = df1.iloc[1]['bssamt'] 
-        else:
-            if not df1.empty and 'bssamt' in df1.columns:
-                base_price = df1.iloc[0]['bssamt']
-                st.warning(f"공고번호 {gongo_nm}: 복수예가 항목이 2개 미만입니다. 첫 번째 예정가격을 기초금액으로 사용합니다.")
-            else:
-                raise ValueError("복수예가 데이터에서 유효한 기초금액을 찾을 수 없습니다.")
-        
-        # ▶ 조합 평균 계산
-        if len(df1['SA_rate']) < 4:
-            raise ValueError(f"복수예가 항목이 4개 미만입니다")
-        combs = itertools.combinations(df1['SA_rate'], 4)
-        rates = [np.mean(c) for c in combs]
-        df_rates = pd.DataFrame(rates, columns=['rate']).sort_values('rate').reset_index(drop=True)
-        df_rates['조합순번'] = range(1, len(df_rates)+1)
-
-        # ▶ 낙찰하한율 조회
-        url2 = f'http://apis.data.go.kr/1230000/ad/BidPublicInfoService/getBidPblancListInfoCnstwk?inqryDiv=2&bidNtceNo={gongo_nm}&pageNo=1&numOfRows=10&type=json&ServiceKey={service_key}'
-        res2 = requests.get(url2, headers=headers)
-        if res2.status_code != 200:
-            raise Exception(f"API 호출 실패 (낙찰하한율): HTTP {res2.status_code}")
-        data2 = json.loads(res2.text)
-        
-        if 'response' not in data2 or 'body' not in data2['response'] or 'items' not in data2['response']['body'] or not data2['response']['body']['items']:
-            raise ValueError(f"낙찰하한율 데이터 없음")
-            
-        items_data2_raw = data2['response']['body']['items']
-        if isinstance(items_data2_raw, dict) and 'item' in items_data2_raw:
-            items_data2 = items_data2_raw['item']
-        else:
-            items_data2 = items_data2_raw
+    except Exception as e:
+        # secrets.toml 자체가 없으면 조회 단계에서 예외가 난다
+        return None, f"❌ 오류 발생: 공고번호 {gongo_nm} - {e}", {"name": "정보 없음", "rate": "N/A"}
+    if service_key is None or not service_key.strip():
+        return None, f"❌ 오류 발생: 공고번호 {gongo_nm} - Streamlit Secrets에 'SERVICE_KEY'가 설정되지 않았거나 비어 있습니다.", {"name": "정보 없음", "rate": "N/A"}
+
+    archive = get_archive()
+    fetch = CachedFetcher(archive, LiveFetcher(service_key, archive=archive))
+    result, error_msg, top_bidder_info, warnings = analyze_raw(gongo_nm, fetch)
+    for warning in warnings:
+        st.warning(warning)
+    return result, error_msg, top_bidder_info
+
+
+# --- 결과 화면 중간 산출물 (메모이즈) ---
+# 위젯을 조작할 때마다 스크립트가 다시 실행되므로, 스타일/병합표/엑셀 바이트는
+# CompactResult.key(공고번호 + 내용 해시)를 기준으로 캐시해 두고 재사용한다.
+# '_' 로 시작하는 인자는 해싱에서 제외된다 (키는 result.key 가 대신한다).
+HIGHLIGHT_TOP = 'background-color: #ffcccc'
+HIGHLIGHT_WATCH = 'background-color: #ffffcc'
+WATCH_COMPANY = "대명포장중기"
+NO_TOP_BIDDER_NAMES = ("정보 없음", "개찰 결과 없음")
+
+
+def highlight_css(labels, top_bidder_name):
+    """Arrow 업체명 컬럼에 대한 강조 스타일 배열 (1순위 > 관심업체 순)."""
+    labels = pc.fill_null(labels, '')
+    if top_bidder_name in NO_TOP_BIDDER_NAMES:
+        is_top = np.zeros(len(labels), dtype=bool)
+    else:
+        is_top = pc.equal(labels, top_bidder_name).to_numpy(zero_copy_only=False)
+    is_watch = pc.match_substring(labels, WATCH_COMPANY).to_numpy(zero_copy_only=False)
+    return np.where(is_top, HIGHLIGHT_TOP, np.where(is_watch, HIGHLIGHT_WATCH, ''))
 
-        if not isinstance(items_data2, list):
-            items_data2 = [items_data2]
 
-        df2 = pd.json_normalize(items_data2)
-        
-        if df2.empty or 'sucsfbidLwltRate' not in df2.columns:
-            raise ValueError(f"낙찰하한율 데이터에 'sucsfbidLwltRate' 컬럼이 없거나 비어 있습니다.")
-        
-        sucsfbidLwltRate = float(df2.loc[0, 'sucsfbidLwltRate'])
-
-        # ▶ A값 계산 (경고 메시지 포함)
-        url3 = f'http://apis.data.go.kr/1230000/ad/BidPublicInfoService/getBidPblancListInfoCnstwkBsisAmount?inqryDiv=2&bidNtceNo={gongo_nm}&pageNo=1&numOfRows=10&type=json&ServiceKey={service_key}'
-        res3 = requests.get(url3, headers=headers)
-        A_value = 0.0 # A값 기본값 0.0으로 설정 (실수형)
-        a_value_warning_displayed = False
-
-        if res3.status_code == 200:
-            data3 = json.loads(res3.text)
-            
-            items_a_value_raw = data3.get('response', {}).get('body', {}).get('items', {})
-            items_a_value = items_a_value_raw.get('item') if isinstance(items_a_value_raw, dict) else items_a_value_raw
-
-            if items_a_value:
-                if not isinstance(items_a_value, list):
-                    items_a_value = [items_a_value]
-                
-                df3 = pd.DataFrame(items_a_value)
-                
-                cost_cols = ['sftyMngcst','sftyChckMngcst','rtrfundNon','mrfnHealthInsrprm','npnInsrprm','odsnLngtrmrcprInsrprm','qltyMngcst']
-                valid_cost_cols = [col for col in cost_cols if col in df3.columns]
-                
-                if valid_cost_cols:
-                    A_value = df3[valid_cost_cols].apply(pd.to_numeric, errors='coerce').fillna(0.0).sum(axis=1).iloc[0]
+def apply_css(df, css_df):
+    """미리 계산한 스타일 프레임을 Styler 에 그대로 입힌다 (행 단위 apply 없음)."""
+    return df.style.apply(lambda _: css_df, axis=None)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def build_individual_css(result_key, top_bidder_name, _table):
+    row_css = highlight_css(_table['강조_업체명'], top_bidder_name)
+    return pd.DataFrame({'rate': row_css, '강조_업체명': row_css})
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def build_merged_table(result_keys, _results_by_gongo, ordered_gongo_nums):
+    """통합 사정율 표(Arrow), 강조 스타일, 헤더용 1순위 정보를 한 번에 만든다."""
+    merged_table = merge_tables(_results_by_gongo, ordered_gongo_nums)
+    top_bidder_info_for_header = {res.gongo_num: res.top_bidder for res in _results_by_gongo}
+
+    css_df = pd.DataFrame('', index=pd.RangeIndex(merged_table.num_rows), columns=merged_table.column_names)
+    for gongo_num_col in merged_table.column_names[1:]:
+        top_info = top_bidder_info_for_header[gongo_num_col]
+        css_df[gongo_num_col] = highlight_css(merged_table[gongo_num_col], top_info['name'])
+
+    return merged_table, css_df, top_bidder_info_for_header
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def build_export_bytes(result_keys, export_format, _merged_table, _css_df):
+    if export_format == "parquet":
+        return to_parquet_bytes(_merged_table)
+    if export_format == "csv":
+        return to_csv_bytes(_merged_table)
+    excel_buffer = io.BytesIO()
+    apply_css(to_pandas(_merged_table), _css_df).to_excel(excel_buffer, index=False, engine='openpyxl')
+    return excel_buffer.getvalue()
+
+
+# 공고별 조합/업체 사정율 원자료 (고정 스키마 COMBO_SCHEMA/BIDDER_SCHEMA + 공고번호)
+@st.cache_data(ttl=3600, show_spinner=False)
+def build_notice_export_bytes(result_keys, kind, _results_by_gongo):
+    return to_parquet_bytes(notice_tables(_results_by_gongo, combo_table if kind == "combo" else bidder_table))
+
+
+@st.fragment
+def render_result_tables(results_by_gongo, gongo_nums):
+    display_width = st.selectbox("📏 표 표시 너비 설정", ["자동(전체 너비)", "고정(좁게)"], key="display_width")
+    use_wide = display_width == "자동(전체 너비)" 
+
+    st.subheader("📈 각 공고별 사정율 분석 결과")
+
+    num_cols_per_row = 2 
+
+    for i in range(0, len(results_by_gongo), num_cols_per_row):
+        cols = st.columns(num_cols_per_row) 
+
+        for j, result_data in enumerate(results_by_gongo[i : i + num_cols_per_row]):
+            with cols[j]: 
+                gongo_num = result_data.gongo_num
+                top_bidder = result_data.top_bidder
+
+                if top_bidder["name"] != "개찰 결과 없음":
+                    st.markdown(f"**공고번호 {gongo_num}**: **{top_bidder['name']}** (사정율: **{top_bidder['rate']}%**)")
                 else:
-                    a_value_warning_displayed = True
-            else:
-                a_value_warning_displayed = True
-        else:
-            a_value_warning_displayed = True
+                    st.markdown(f"**공고번호 {gongo_num}**: 개찰 결과 정보 없음")
 
-        if a_value_warning_displayed:
-            st.warning(f"⚠️ 경고: 공고번호 {gongo_nm} - A값 데이터 없음. A값은 0으로 처리됩니다.")
+                table = display_table(result_data)
+                css_df = build_individual_css(result_data.key, top_bidder['name'], table)
 
-        # ▶ 개찰결과 (여기서 맨 첫 번째 업체가 1순위)
-        url4 = f'http://apis.data.go.kr/1230000/as/ScsbidInfoService/getOpengResultListInfoOpengCompt?serviceKey={service_key}&pageNo=1&numOfRows=999&bidNtceNo={gongo_nm}'
-        res4 = requests.get(url4, headers=headers)
-        if res4.status_code != 200:
-            raise Exception(f"API 호출 실패 (개찰결과): HTTP {res4.status_code}")
-        
-        # XML 응답을 JSON으로 변환
-        data4 = json.loads(json.dumps(xmltodict.parse(res4.text)))
-        
-        if 'response' not in data4 or 'body' not in data4['response'] or 'items' not in data4['response']['body'] or 'item' not in data4['response']['body']['items']:
-            df4 = pd.DataFrame() # 개찰 결과 데이터가 없으면 빈 DataFrame
-        else:
-            items = data4['response']['body']['items']['item']
-            if not isinstance(items, list):
-                items = [items]
-            df4 = pd.DataFrame(items)
-            df4['bidprcAmt'] = pd.to_numeric(df4['bidprcAmt'], errors='coerce')
-            df4 = df4.dropna(subset=['bidprcAmt'])
-
-        if not df4.empty:
-            top_bidder_name = df4.iloc[0]['prcbdrNm']
-
-            if sucsfbidLwltRate != 0 and base_price != 0:
-                # 사정율 계산식: ((입찰금액 - A값) * 100 / 낙찰하한율) + A값) * 100 / 기초금액
-                df4['rate'] = (((df4['bidprcAmt'] - A_value) * 100) / sucsfbidLwltRate + A_value) * 100 / base_price
-            else:
-                df4['rate'] = np.nan
-
-            df4 = df4.drop_duplicates(subset=['rate']).copy()
-            df4 = df4[(df4['rate'] >= 90) & (df4['rate'] <= 110)].copy()
-            df4 = df4[['prcbdrNm', 'rate']].rename(columns={'prcbdrNm': '업체명'})
-
-            top_bidder_rate_row = df4[df4['업체명'] == top_bidder_name]
-            if not top_bidder_rate_row.empty:
-                top_bidder_info = {
-                    "name": top_bidder_name,
-                    "rate": round(top_bidder_rate_row.iloc[0]['rate'], 5)
-                }
-            else:
-                 top_bidder_info = {"name": top_bidder_name, "rate": "범위 외"}
-        else:
-            top_bidder_info = {"name": "개찰 결과 없음", "rate": "N/A"}
-
-        # 조합 사정율과 개찰 결과 사정율을 병합
-        # Line 222
-        df_combined_gongo = pd.concat([
-            df_rates[['rate']].assign(업체명=df_rates['조합순번'].astype(str)), 
-            df4[['업체명', 'rate']] # 여기에 누락된 '업체명' 컬럼을 추가했습니다.
-        ], ignore_index=True).sort_values('rate').reset_index(drop=True)
-        df_combined_gongo['rate'] = round(df_combined_gongo['rate'], 5)
-        
-        df_combined_gongo['공고번호'] = gongo_nm 
-        df_combined_gongo['강조_업체명'] = df_combined_gongo['업체명']
-        df_combined_gongo = df_combined_gongo.fillna('')
+                st.dataframe(
+                    apply_css(to_pandas(table), css_df),
+                    use_container_width=use_wide,
+                    hide_index=True,
+                    height=min(35 * table.num_rows + 38, 400) 
+                )
+                st.markdown("---") 
+
+    st.markdown("---") 
+    st.subheader("📊 통합 사정율 분석 결과") 
 
-        return df_combined_gongo, None, top_bidder_info 
+    result_keys = tuple(res.key for res in results_by_gongo)
+    ordered_gongo_nums = gongo_nums[::-1] 
+    merged_table, css_df, top_bidder_info_for_header = build_merged_table(result_keys, results_by_gongo, ordered_gongo_nums)
 
-    except ValueError as ve:
-        return pd.DataFrame(), f"⚠️ 경고: 공고번호 {gongo_nm} - {ve}", top_bidder_info
-    except Exception as e:
-        return pd.DataFrame(), f"❌ 오류 발생: 공고번호 {gongo_nm} - {e}", top_bidder_info
+    if merged_table.num_rows == 0:
+        st.info("분석할 유효한 공고번호가 없거나 데이터 병합에 실패했습니다.")
+        return
+
+    column_config_dict = {"rate": "Rate"} 
+
+    for gongo_num_col in merged_table.column_names[1:]: 
+        top_info = top_bidder_info_for_header.get(gongo_num_col, {"name": "정보 없음", "rate": "N/A"})
+
+        header_text = f"{gongo_num_col}" 
+        if top_info["name"] != "개찰 결과 없음" and isinstance(top_info["rate"], float):
+            header_text += f"\n({top_info['rate']:.5f}%)" 
+        else:
+            header_text += "\n(정보 없음)" 
+
+        column_config_dict[gongo_num_col] = st.column_config.TextColumn(
+            label=header_text, 
+            width="small" 
+        )
+
+    st.dataframe(
+        apply_css(to_pandas(merged_table), css_df),
+        use_container_width=use_wide,
+        hide_index=True,
+        height=min(35 * merged_table.num_rows + 38, 600),
+        column_config=column_config_dict 
+    )
+
+
+@st.fragment
+def render_rate_filter(results_by_gongo):
+    st.subheader("🔎 사정율 구간 조회")
+
+    gongo_num = st.selectbox("공고번호", [res.gongo_num for res in results_by_gongo], key="rate_filter_gongo")
+    index = rate_index_for(next(res for res in results_by_gongo if res.gongo_num == gongo_num))
+
+    low_default, high_default = float(index.combo_rates[0]), float(index.combo_rates[-1])
+    col_low, col_high = st.columns(2)
+    low = col_low.number_input("사정율 하한", value=low_default, step=0.1, format="%.5f", key=f"rate_filter_low_{gongo_num}")
+    high = col_high.number_input("사정율 상한", value=high_default, step=0.1, format="%.5f", key=f"rate_filter_high_{gongo_num}")
+
+    combo_ids, combo_rates = index.combos_between(low, high)
+    bidder_names, bidder_rates = index.bidders_between(low, high)
+    top_rank = index.top_bidder_combo_rank()
+    st.markdown(
+        f"구간 내 조합 **{len(combo_ids):,}개** / 업체 **{len(bidder_names):,}곳** · "
+        f"1순위 조합 중 순위: **{top_rank if top_rank is not None else '정보 없음'}** / {len(index.combo_rates):,}"
+    )
+
+    col_combos, col_bidders = st.columns(2)
+    with col_combos:
+        st.dataframe(
+            pa.table({'조합순번': combo_ids, '사정율': combo_rates}),
+            use_container_width=True, hide_index=True, height=min(35 * len(combo_ids) + 38, 300),
+        )
+    with col_bidders:
+        neighbours = index.bidder_neighbours(low, high)
+        st.dataframe(neighbours, use_container_width=True, hide_index=True, height=min(35 * len(neighbours) + 38, 300))
+
+
+# 과거 분포 모드의 경쟁 업체 표본. 슬라이더를 움직일 때마다 색인을 다시 읽지 않도록 잠시 캐시한다.
+@st.cache_data(ttl=300)
+def historical_competitor_rates(gongo_num):
+    return get_bidder_index().rates(exclude_gongo=gongo_num)
+
+
+@st.fragment
+def render_optimizer(results_by_gongo):
+    st.subheader("🎯 투찰 금액별 낙찰 확률")
+
+    gongo_num = st.selectbox("공고번호", [res.gongo_num for res in results_by_gongo], key="optimizer_gongo")
+    result = next(res for res in results_by_gongo if res.gongo_num == gongo_num)
+
+    modes = ["해당 공고 개찰 업체", "누적 색인의 다른 공고 업체 사정율 분포"]
+    mode = st.radio("경쟁 업체 사정율", modes, index=0 if len(result.bidder_rates) else 1, horizontal=True, key="optimizer_mode")
+
+    if mode == modes[0]:
+        optimization = optimize_bid(result)
+    else:
+        # 채점 대상 공고 자신의 개찰 업체는 표본에서 뺀다
+        competitor_pool, n_pool_notices = historical_competitor_rates(gongo_num)
+        if len(competitor_pool) == 0:
+            st.info("업체 사정율 색인에 다른 공고 기록이 없습니다. 공고를 더 분석하거나 `python bidder_index.py build` 로 색인을 만들어 주세요.")
+            return
+        st.caption(f"표본: 공고 {n_pool_notices:,}건의 업체 사정율 {len(competitor_pool):,}건 (공고번호 {gongo_num} 제외)")
+        n_competitors = st.slider("예상 경쟁 업체 수", 1, 500, value=min(max(len(result.bidder_rates), 10), 500), key="optimizer_n_competitors")
+        optimization = optimize_bid(result, competitor_rates=competitor_pool, n_competitors=n_competitors)
+
+    if len(optimization.bid_amounts) == 0:
+        st.info("기초금액/낙찰하한율 정보가 없어 낙찰 확률을 계산할 수 없습니다.")
+        return
+
+    st.markdown(
+        f"최적 투찰 금액: **{optimization.best_bid:,.0f}원** "
+        f"(사정율 {optimization.best_rate:.5f}%, 낙찰 확률 {optimization.best_prob:.1%})"
+    )
+    st.line_chart(
+        pd.DataFrame({'투찰금액': optimization.bid_amounts, '낙찰확률': optimization.win_prob}),
+        x='투찰금액',
+        y='낙찰확률',
+    )
+
+
+@st.fragment
+def render_company_history(results_by_gongo):
+    st.subheader("🏢 업체별 사정율 이력")
+    bidder_index = get_bidder_index()
+    stats = bidder_index.stats()
+    st.caption(f"누적 색인: 공고 {stats['notices']:,}건 · 업체 {stats['companies']:,}곳 · 기록 {stats['postings']:,}건")
+
+    company_key = st.text_input("업체명 또는 사업자번호", key="company_history_key")
+    limit = st.number_input("최근 공고 수", min_value=10, max_value=5000, value=500, step=50, key="company_history_limit")
+    if company_key.strip():
+        history = bidder_index.history(company_key, limit=int(limit))
+        if history.empty:
+            st.info("색인된 이력이 없습니다.")
+        else:
+            st.dataframe(history, use_container_width=True, hide_index=True, height=min(35 * len(history) + 38, 400))
+
+    current_companies = sorted({name for res in results_by_gongo for name in res.bidder_names})
+    selected = st.multiselect("함께 참여한 공고 찾기 (업체 선택)", current_companies, key="company_common_keys")
+    if selected:
+        common = bidder_index.common_notices(selected)
+        st.write(f"{len(selected)}개 업체가 모두 참여한 공고 {len(common)}건")
+        if common:
+            st.dataframe(pd.DataFrame({'공고번호': common}), hide_index=True, height=min(35 * len(common) + 38, 300))
+
+
+@st.fragment
+def render_download(results_by_gongo, gongo_nums):
+    st.subheader("📥 전체 결과 다운로드")
+    now = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"통합_사정율분석_{now}"
+
+    # 병합표는 render_result_tables 와 같은 키로 캐시되어 있으므로 다시 만들지 않는다.
+    result_keys = tuple(res.key for res in results_by_gongo)
+    merged_table, css_df, _ = build_merged_table(result_keys, results_by_gongo, gongo_nums[::-1])
+
+    if merged_table.num_rows > 0: 
+        col_excel, col_parquet, col_csv = st.columns(3)
+        col_excel.download_button(
+            label="통합 결과 엑셀 다운로드",
+            data=build_export_bytes(result_keys, "xlsx", merged_table, css_df),
+            file_name=f"{filename}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            key="download_button_key" 
+        )
+        col_parquet.download_button(
+            label="Parquet 다운로드",
+            data=build_export_bytes(result_keys, "parquet", merged_table, css_df),
+            file_name=f"{filename}.parquet",
+            mime="application/vnd.apache.parquet",
+            key="download_parquet_key"
+        )
+        col_csv.download_button(
+            label="CSV 다운로드",
+            data=build_export_bytes(result_keys, "csv", merged_table, css_df),
+            file_name=f"{filename}.csv",
+            mime="text/csv",
+            key="download_csv_key"
+        )
+        col_combo, col_bidder, _ = st.columns(3)
+        col_combo.download_button(
+            label="공고별 조합 사정율 Parquet",
+            data=build_notice_export_bytes(result_keys, "combo", results_by_gongo),
+            file_name=f"조합사정율_{now}.parquet",
+            mime="application/vnd.apache.parquet",
+            key="download_combo_parquet_key"
+        )
+        col_bidder.download_button(
+            label="공고별 업체 사정율 Parquet",
+            data=build_notice_export_bytes(result_keys, "bidder", results_by_gongo),
+            file_name=f"업체사정율_{now}.parquet",
+            mime="application/vnd.apache.parquet",
+            key="download_bidder_parquet_key"
+        )
+    else:
+        st.info("다운로드할 통합 결과 데이터가 없습니다.")
 
 
 st.subheader("🔍 분석할 공고번호를 1개에서 10개까지 입력하세요 (줄바꿈으로 구분)")
@@ -245,6 +403,7 @@ def reset_app():
     st.session_state.results_by_gongo_data = [] 
     st.session_state.errors_data = []
     st.session_state.processed_gongo_nums = [] 
+    result_store.hold(st.session_state.result_holder, [])
     st.cache_data.clear()
 
 if st.session_state.analysis_completed or st.session_state.gongo_nums_input_value.strip():
@@ -275,22 +434,24 @@ if not st.session_state.analysis_completed:
 
             for i, gongo_nm in enumerate(gongo_nums): 
                 status_text.text(f"📊 공고번호 {gongo_nm} 분석 중... ({i+1}/{len(gongo_nums)})")
-                df_result, error_msg, top_bidder_info = analyze_gongo(gongo_nm)
+                result, error_msg, top_bidder_info = analyze_gongo(gongo_nm)
                 
                 if error_msg: 
                     errors.append(error_msg)
-                if not df_result.empty: 
-                    results_by_gongo.append({
-                        "gongo_num": gongo_nm,
-                        "df": df_result,
-                        "top_bidder": top_bidder_info
-                    })
+                if result is not None and len(result): 
+                    # 같은 공고를 다른 세션이 이미 분석했다면 그 결과 객체를 함께 참조한다.
+                    results_by_gongo.append(result_store.intern(result))
+                    try:
+                        get_bidder_index().add(result)
+                    except sqlite3.Error as e:
+                        errors.append(f"⚠️ 경고: 공고번호 {gongo_nm} - 업체 이력 색인 실패 ({e})")
                 progress_bar.progress((i + 1) / len(gongo_nums)) 
 
             status_text.empty() 
             progress_bar.empty() 
 
             st.session_state.results_by_gongo_data = results_by_gongo 
+            result_store.hold(st.session_state.result_holder, results_by_gongo)
             st.session_state.errors_data = errors 
             st.session_state.analysis_completed = True 
             st.rerun() 
@@ -303,152 +464,25 @@ else:
     st.markdown("---") 
 
     if results_by_gongo:
-        st.subheader("📈 각 공고별 사정율 분석 결과")
-        
-        num_cols_per_row = 2 
-        
-        for i in range(0, len(results_by_gongo), num_cols_per_row):
-            cols = st.columns(num_cols_per_row) 
-            
-            for j, result_data in enumerate(results_by_gongo[i : i + num_cols_per_row]):
-                with cols[j]: 
-                    gongo_num = result_data["gongo_num"]
-                    df = result_data["df"]
-                    top_bidder = result_data["top_bidder"]
-
-                    if top_bidder["name"] != "개찰 결과 없음":
-                        st.markdown(f"**공고번호 {gongo_num}**: **{top_bidder['name']}** (사정율: **{top_bidder['rate']}%**)")
-                    else:
-                        st.markdown(f"**공고번호 {gongo_num}**: 개찰 결과 정보 없음")
-                    
-                    def highlight_top_bidder_individual(row, top_bidder_name):
-                        styles = [''] * len(row)
-                        if pd.notna(row['강조_업체명']) and row['강조_업체명'] == top_bidder_name:
-                            styles = ['background-color: #ffcccc'] * len(row) 
-                        elif pd.notna(row['강조_업체명']) and "대명포장중기" in row['강조_업체명']:
-                            styles = ['background-color: #ffffcc'] * len(row) 
-                        return styles
-
-                    display_df_styled = df[['rate', '강조_업체명']].style.apply(
-                        lambda row: highlight_top_bidder_individual(row, top_bidder['name']), axis=1
-                    )
-
-                    st.dataframe(
-                        display_df_styled,
-                        use_container_width=True,
-                        hide_index=True,
-                        height=min(35 * len(df) + 38, 400) 
-                    )
-                    st.markdown("---") 
-
-        st.markdown("---") 
-        st.subheader("📊 통합 사정율 분석 결과") 
-
-        merged_df = pd.DataFrame()
-        top_bidder_info_for_header = {} 
-
-        if results_by_gongo:
-            all_rates = pd.concat([res['df']['rate'] for res in results_by_gongo], ignore_index=True).unique()
-            base_rates_df = pd.DataFrame({'rate': all_rates}).sort_values('rate').reset_index(drop=True)
-            merged_df = base_rates_df
-        
-        ordered_gongo_nums = gongo_nums[::-1] 
-        
-        for gongo_num_to_process in ordered_gongo_nums:
-            current_result_data = next((res for res in results_by_gongo if res['gongo_num'] == gongo_num_to_process), None)
-            
-            if current_result_data:
-                df_current_gongo = current_result_data["df"].copy()
-                top_bidder = current_result_data["top_bidder"]
-                
-                df_for_merge = df_current_gongo[['rate', '강조_업체명']].copy()
-                df_for_merge.rename(columns={'강조_업체명': f'{gongo_num_to_process}'}, inplace=True) 
-                
-                merged_df = pd.merge(merged_df, df_for_merge, on='rate', how='outer')
-                
-                top_bidder_info_for_header[gongo_num_to_process] = top_bidder 
-
-        if not merged_df.empty:
-            final_merged_df = merged_df.sort_values(by='rate').reset_index(drop=True)
-            
-            final_merged_df = final_merged_df.fillna('') 
-
-            columns_order = ['rate'] + ordered_gongo_nums 
-            final_merged_df = final_merged_df[columns_order]
-
-            column_config_dict = {"rate": "Rate"} 
-
-            for gongo_num_col in ordered_gongo_nums: 
-                top_info = top_bidder_info_for_header.get(gongo_num_col, {"name": "정보 없음", "rate": "N/A"})
-                
-                header_text = f"{gongo_num_col}" 
-                if top_info["name"] != "개찰 결과 없음" and top_info["rate"] != "N/A":
-                    header_text += f"\n({top_info['rate']:.5f}%)" 
-                else:
-                    header_text += "\n(정보 없음)" 
-                
-                column_config_dict[gongo_num_col] = st.column_config.TextColumn(
-                    label=header_text, 
-                    width="small" 
-                )
-            
-            def highlight_top_bidder_in_merged_table(s, top_bidder_info_map):
-                current_gongo_num_raw = s.name 
-                top_info = top_bidder_info_map.get(current_gongo_num_raw) 
-                
-                styles = []
-                for val in s:
-                    style = ''
-                    if top_info and top_info['name'] != "정보 없음" and top_info['name'] != "개찰 결과 없음" and \
-                       pd.notna(val) and val == top_info['name']:
-                        style = 'background-color: #ffcccc' 
-                    elif pd.notna(val) and "대명포장중기" in val and \
-                         not (top_info and top_info['name'] != "정보 없음" and top_info['name'] != "개찰 결과 없음" and val == top_info['name']):
-                        style = 'background-color: #ffffcc' 
-                    styles.append(style)
-                return styles 
-
-            columns_to_style = [col for col in final_merged_df.columns if col != 'rate']
-
-            styled_final_merged_df = final_merged_df.style.apply(
-                lambda s: highlight_top_bidder_in_merged_table(s, top_bidder_info_for_header), 
-                subset=columns_to_style
-            )
-            
-            st.dataframe(
-                styled_final_merged_df,
-                use_container_width=True,
-                hide_index=True,
-                height=min(35 * len(final_merged_df) + 38, 600),
-                column_config=column_config_dict 
-            )
-        else:
-            st.info("분석할 유효한 공고번호가 없거나 데이터 병합에 실패했습니다.")
-
-
-        st.subheader("📥 전체 결과 다운로드")
-        now = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"통합_사정율분석_{now}.xlsx"
-        
-        if not final_merged_df.empty: 
-            excel_buffer = io.BytesIO()
-            styled_final_merged_df.to_excel(excel_buffer, index=False, engine='openpyxl') 
-            excel_buffer.seek(0)
-            
-            st.download_button(
-                label="통합 결과 엑셀 다운로드",
-                data=excel_buffer,
-                file_name=filename,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                key="download_button_key" 
-            )
-        else:
-            st.info("다운로드할 통합 결과 데이터가 없습니다.")
-        
+        # 표/다운로드 영역은 각각 fragment 로 분리되어, 내부 위젯 조작 시 해당 영역만 재실행된다.
+        render_result_tables(results_by_gongo, gongo_nums)
+        render_rate_filter(results_by_gongo)
+        render_optimizer(results_by_gongo)
+        render_company_history(results_by_gongo)
+        render_download(results_by_gongo, gongo_nums)
 
     else:
         st.warning("분석할 유효한 공고번호가 없거나 모든 공고번호에서 오류가 발생했습니다.")
 
+    with st.expander("💾 결과 저장소 메모리 사용량"):
+        stats = result_store.stats()
+        st.write(
+            f"공유 결과 {stats['entries']}건 / 참조 세션 {stats['sessions']}개 (누적 조회 {stats['requests']}회) · "
+            f"압축 저장 {stats['compact_bytes'] / 1024:,.1f} KB "
+            f"(현재 세션별 DataFrame 복사 시 {stats['legacy_bytes'] / 1024:,.1f} KB, "
+            f"절약 {stats['saved_bytes'] / 1024:,.1f} KB)"
+        )
+
     if errors:
         st.subheader("⚠️ 분석 중 발생한 경고 및 오류:")
         for err in errors:
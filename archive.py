@@ -0,0 +1,180 @@
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from analysis import ENDPOINTS, RawResponse, is_complete
+
+# ▶ 원본 응답 아카이브
+# 네 엔드포인트의 응답 본문을 압축해서 내용 해시(sha256)로 저장한다. 같은 본문은 한 번만 저장된다.
+#
+#   <root>/objects/ab/cdef...   zlib 압축된 응답 본문
+#   <root>/notices/<공고번호>.json  {endpoint: {"sha256", "status_code", "fetched_at", "complete"[, "failed_at"]}}
+#   <root>/locks/<공고번호>.lock    manifest 갱신용 잠금 파일
+#
+# 앱 세션(스레드)과 prefetch.py(별도 프로세스)가 같은 manifest 를 고치므로, 읽기-수정-쓰기는 공고별 flock 으로 직렬화한다.
+# 한 번 완전한 응답을 받은 엔드포인트는 이후 오류/빈 응답으로 덮어쓰지 않는다 (재계산용 원본을 잃지 않도록).
+#
+# 계산식이 바뀌어도 data.go.kr 를 다시 부르지 않고 replay.py 로 전부 재계산할 수 있다.
+
+DEFAULT_ARCHIVE_DIR = os.environ.get("GONGO_ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive"))
+
+
+def _atomic_write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ResponseArchive:
+    def __init__(self, root=DEFAULT_ARCHIVE_DIR):
+        self.root = root
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest[2:])
+
+    def _manifest_path(self, gongo_nm):
+        return os.path.join(self.root, "notices", f"{gongo_nm}.json")
+
+    @contextmanager
+    def _manifest_lock(self, gongo_nm):
+        lock_dir = os.path.join(self.root, "locks")
+        os.makedirs(lock_dir, exist_ok=True)
+        # 열 때마다 새 파일 디스크립터를 쓰므로 같은 프로세스의 스레드끼리도 서로 막힌다
+        with open(os.path.join(lock_dir, f"{gongo_nm}.lock"), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def put_object(self, body):
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            _atomic_write(path, zlib.compress(body, 6))
+        return digest
+
+    def get_object(self, digest):
+        with open(self._object_path(digest), 'rb') as f:
+            body = zlib.decompress(f.read())
+        if hashlib.sha256(body).hexdigest() != digest:
+            raise ValueError(f"아카이브 객체 손상: {digest}")
+        return body
+
+    def manifest(self, gongo_nm):
+        try:
+            with open(self._manifest_path(gongo_nm), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def put(self, gongo_nm, endpoint, raw):
+        """엔드포인트 응답을 저장하고 공고별 manifest 를 최신 응답으로 갱신한다.
+
+        이미 완전한(항목이 있는 200) 응답이 있으면 오류/빈 응답으로 덮어쓰지 않고 실패 시각(failed_at)만 남긴다.
+        """
+        if endpoint not in ENDPOINTS:
+            raise KeyError(endpoint)
+        digest = self.put_object(raw.body)
+        entry = {
+            "sha256": digest,
+            "status_code": raw.status_code,
+            "fetched_at": datetime.now().isoformat(timespec='seconds'),
+            "complete": is_complete(endpoint, raw),
+        }
+        with self._manifest_lock(gongo_nm):
+            manifest = self.manifest(gongo_nm)
+            previous = manifest.get(endpoint)
+            if previous is not None and previous.get("complete") and not entry["complete"]:
+                previous["failed_at"] = entry["fetched_at"]
+                digest = previous["sha256"]
+            else:
+                manifest[endpoint] = entry
+            _atomic_write(self._manifest_path(gongo_nm), json.dumps(manifest, ensure_ascii=False, indent=1).encode('utf-8'))
+        return digest
+
+    def get(self, gongo_nm, endpoint):
+        entry = self.manifest(gongo_nm).get(endpoint)
+        if entry is None:
+            raise KeyError(f"아카이브에 없음: 공고번호 {gongo_nm} ({endpoint})")
+        return RawResponse(entry["status_code"], self.get_object(entry["sha256"]))
+
+    def gongo_nums(self):
+        notices_dir = os.path.join(self.root, "notices")
+        if not os.path.isdir(notices_dir):
+            return []
+        return sorted(name[:-len(".json")] for name in os.listdir(notices_dir) if name.endswith(".json"))
+
+    def __contains__(self, gongo_nm):
+        return os.path.exists(self._manifest_path(gongo_nm))
+
+
+class ArchiveFetcher:
+    """아카이브에서 응답을 읽는 fetch (네트워크 없음)."""
+
+    def __init__(self, archive):
+        self.archive = archive
+
+    def __call__(self, gongo_nm, endpoint):
+        return self.archive.get(gongo_nm, endpoint)
+
+
+# ▶ 아카이브를 공유 캐시로 쓰는 fetch
+# 아카이브에 충분히 최근 응답이 있으면 그대로 쓰고, 없거나 오래됐으면 live fetch 로 받는다 (받은 응답은 live 쪽에서 아카이브에 저장).
+# 복수예가/개찰결과는 개찰 후 한 번 채워지면 바뀌지 않으므로 계속 재사용한다.
+FINAL_ENDPOINTS = ('prepar', 'opengcompt')
+COMPLETE_TTL = timedelta(hours=24)
+INCOMPLETE_TTL = timedelta(minutes=5)
+
+
+def is_fresh(endpoint, entry, now=None):
+    if entry is None:
+        return False
+    if entry.get("complete") and endpoint in FINAL_ENDPOINTS:
+        return True
+    now = now or datetime.now()
+    # 완전한 응답을 갱신하려다 실패했으면 잠시 그 응답을 그대로 쓴다 (실패한 요청을 매번 반복하지 않도록)
+    if entry.get("complete") and "failed_at" in entry and now - datetime.fromisoformat(entry["failed_at"]) < INCOMPLETE_TTL:
+        return True
+    age = now - datetime.fromisoformat(entry["fetched_at"])
+    return age < (COMPLETE_TTL if entry.get("complete") else INCOMPLETE_TTL)
+
+
+class CachedFetcher:
+    def __init__(self, archive, live):
+        self.archive = archive
+        self.live = live
+
+    def __call__(self, gongo_nm, endpoint):
+        entry = self.archive.manifest(gongo_nm).get(endpoint)
+        if is_fresh(endpoint, entry):
+            try:
+                return RawResponse(entry["status_code"], self.archive.get_object(entry["sha256"]))
+            except (OSError, ValueError):
+                pass  # 객체가 없거나 손상되면 새로 받는다
+        try:
+            raw = self.live(gongo_nm, endpoint)
+        except Exception:
+            # 네트워크 오류 시 오래된 응답이라도 있으면 쓴다
+            if entry is None:
+                raise
+            return RawResponse(entry["status_code"], self.archive.get_object(entry["sha256"]))
+        # 오류/빈 응답이 오면 예전에 받아 둔 완전한 응답을 쓴다
+        if entry is not None and entry.get("complete") and not is_complete(endpoint, raw):
+            try:
+                return RawResponse(entry["status_code"], self.archive.get_object(entry["sha256"]))
+            except (OSError, ValueError):
+                pass
+        return raw
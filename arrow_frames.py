@@ -0,0 +1,118 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from result_store import NO_BIDDER, NO_COMBO
+
+# ▶ Arrow 결과 테이블
+# CompactResult 의 배열을 고정 스키마 Arrow 테이블로 내보내고, 병합/라벨/내보내기를 Arrow compute 로 처리한다.
+# 숫자 배열은 복사 없이 Arrow 로 넘어가며, 업체명은 dictionary(카테고리) 컬럼이다.
+# 화면 강조(Styler)가 필요한 곳에서만 Arrow 기반 dtype 으로 pandas 변환을 한다 (object 컬럼 없음).
+# 조합/업체 고정 스키마 테이블(combo_table/bidder_table)은 공고별 원자료 Parquet 내보내기와 업체 사정율 색인이 쓴다.
+
+COMBO_SCHEMA = pa.schema([
+    ('조합순번', pa.int16()),
+    ('rate', pa.float64()),
+])
+
+BIDDER_SCHEMA = pa.schema([
+    ('업체명', pa.dictionary(pa.int16(), pa.string())),
+    ('사업자번호', pa.string()),
+    ('순위', pa.int16()),
+    ('rate', pa.float64()),
+])
+
+# 공고별 표: 조합 행은 조합순번, 업체 행은 업체명을 라벨로 쓴다
+DISPLAY_SCHEMA = pa.schema([
+    ('rate', pa.float64()),
+    ('강조_업체명', pa.string()),
+])
+
+
+def combo_table(result):
+    is_combo = result.combo_ids != NO_COMBO
+    return pa.table([result.combo_ids[is_combo], result.rates[is_combo]], schema=COMBO_SCHEMA)
+
+
+def bidder_table(result):
+    is_bidder = result.bidder_codes != NO_BIDDER
+    codes = result.bidder_codes[is_bidder]
+    names = pa.DictionaryArray.from_arrays(pa.array(codes, type=pa.int16()), pa.array(result.bidder_names, type=pa.string()))
+    biznos = pa.array(result.bidder_biznos, type=pa.string()).take(pa.array(result.bizno_codes[is_bidder]))
+    ranks = result.bidder_ranks[is_bidder]
+    return pa.table([names, biznos, ranks, result.rates[is_bidder]], schema=BIDDER_SCHEMA)
+
+
+def notice_tables(results, table_func):
+    """공고별 combo_table/bidder_table 을 맨 앞에 공고번호 컬럼을 붙여 하나로 잇는다."""
+    tables = []
+    for result in results:
+        table = table_func(result)
+        tables.append(table.add_column(0, '공고번호', pa.array([result.gongo_num] * table.num_rows, type=pa.string())))
+    if not tables:
+        schema = COMBO_SCHEMA if table_func is combo_table else BIDDER_SCHEMA
+        return schema.insert(0, pa.field('공고번호', pa.string())).empty_table()
+    # 업체명 dictionary 는 공고마다 다르므로 하나로 합친다
+    return pa.concat_tables(tables).unify_dictionaries()
+
+
+def display_table(result):
+    """공고별 (rate, 강조_업체명) 테이블. rate 오름차순."""
+    rates = pa.array(result.rates)
+    combo_labels = pc.cast(pa.array(result.combo_ids), pa.string())
+    # 조합 행(-1)은 빈 이름을 가리키게 해서 업체명 배열을 한 번에 만든다
+    names = pa.array(result.bidder_names + ('',), type=pa.string())
+    bidder_labels = names.take(pa.array(np.where(result.bidder_codes == NO_BIDDER, len(result.bidder_names), result.bidder_codes)))
+    labels = pc.if_else(pa.array(result.combo_ids != NO_COMBO), combo_labels, bidder_labels)
+    return pa.table([rates, labels], schema=DISPLAY_SCHEMA)
+
+
+def merge_tables(results, ordered_gongo_nums):
+    """통합 사정율 표: 전체 rate 기준으로 공고별 라벨 컬럼을 full outer join. 빈 칸은 ''."""
+    by_gongo = {res.gongo_num: res for res in results}
+    columns = [gongo_num for gongo_num in ordered_gongo_nums if gongo_num in by_gongo]
+    if not columns:
+        return pa.table({'rate': pa.array([], type=pa.float64())})
+
+    all_rates = pc.unique(pa.chunked_array([pa.array(by_gongo[gongo_num].rates) for gongo_num in columns]))
+    merged = pa.table({'rate': all_rates})
+    order_keys = [('rate', 'ascending')]
+    for i, gongo_num in enumerate(columns):
+        table = display_table(by_gongo[gongo_num])
+        # join 결과의 행 순서는 보장되지 않으므로 공고별 원래 순서를 함께 들고 가서 정렬한다
+        right = pa.table({
+            'rate': table['rate'],
+            gongo_num: table['강조_업체명'],
+            f'__order_{i}': pa.array(np.arange(len(table), dtype=np.int32)),
+        })
+        merged = merged.join(right, keys='rate', join_type='full outer')
+        order_keys.append((f'__order_{i}', 'ascending'))
+
+    merged = merged.sort_by(order_keys).select(['rate'] + columns)
+    return pa.table(
+        [merged['rate']] + [pc.fill_null(merged[gongo_num], '') for gongo_num in columns],
+        names=['rate'] + columns,
+    )
+
+
+def to_pandas(table):
+    """Styler 용 pandas 변환. 컬럼은 Arrow 기반 dtype 으로 유지한다."""
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def to_parquet_bytes(table):
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression='zstd')
+    return buffer.getvalue()
+
+
+def to_csv_bytes(table):
+    buffer = io.BytesIO()
+    buffer.write(b'\xef\xbb\xbf')  # 엑셀에서 한글이 깨지지 않도록 BOM
+    pa_csv.write_csv(table, buffer)
+    return buffer.getvalue()
@@ -0,0 +1,171 @@
+import argparse
+import os
+import time
+from collections import namedtuple
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from archive import DEFAULT_ARCHIVE_DIR
+from replay import map_chunks
+
+# ▶ 투찰 전략 백테스트
+# 전략은 공고 하나(CompactResult)를 받아 투찰 사정율을 돌려주는 함수다.
+# 사정율 r 로 투찰하면 실제 예정가격 사정율이 r 이하일 때만 낙찰하한 이상이 되므로,
+# 그 공고에서 이기는 구간은 [실제 예정가격 사정율, 1순위 사정율) 이다.
+# 실제 예정가격(추첨 복수예가)이 없으면 1순위 바로 아래 업체의 사정율을 하한으로 쓴다 (낙관적 추정).
+# 추정으로 판정한 공고는 낙찰수/낙찰률에 넣지 않고 추정공고수/추정낙찰수로 따로 보고한다.
+#
+#   python backtest.py --workers 8
+#   python backtest.py --scaling          # 프로세스 수별 처리 시간 비교
+
+Strategy = namedtuple('Strategy', ['name', 'func'])
+
+
+def densest_rate(result, k=1, bin_width=0.05):
+    """조합 사정율 히스토그램에서 k번째로 밀집한 구간의 중앙값."""
+    combo_rates = result.combo_rates
+    if len(combo_rates) == 0:
+        return np.nan
+    lo = np.floor(combo_rates[0] / bin_width) * bin_width
+    bins = np.floor((combo_rates - lo) / bin_width).astype(np.intp)
+    counts = np.bincount(bins)
+    order = np.argsort(-counts, kind='stable')
+    if k > len(order) or counts[order[k - 1]] == 0:
+        return np.nan
+    return lo + (order[k - 1] + 0.5) * bin_width
+
+
+def quantile_rate(result, q=0.5):
+    combo_rates = result.combo_rates
+    return float(np.quantile(combo_rates, q)) if len(combo_rates) else np.nan
+
+
+def mean_rate(result):
+    combo_rates = result.combo_rates
+    return float(combo_rates.mean()) if len(combo_rates) else np.nan
+
+
+def default_strategies():
+    return [
+        Strategy("예정가격 분포 최빈값 (0.02 구간)", partial(densest_rate, k=1, bin_width=0.02)),
+        Strategy("1번째 밀집 조합 (0.05 구간)", partial(densest_rate, k=1)),
+        Strategy("2번째 밀집 조합 (0.05 구간)", partial(densest_rate, k=2)),
+        Strategy("3번째 밀집 조합 (0.05 구간)", partial(densest_rate, k=3)),
+        Strategy("조합 중앙값", partial(quantile_rate, q=0.5)),
+        Strategy("조합 평균", mean_rate),
+    ]
+
+
+def outcome_bounds(result):
+    """이기는 사정율 구간 (하한, 1순위 사정율, 하한이 실제 예정가격인지). 판정할 수 없으면 NaN."""
+    top_rate = result.top_bidder_rate
+    if not isinstance(top_rate, float):
+        return np.nan, np.nan, False
+    if np.isfinite(result.actual_rate):
+        return result.actual_rate, top_rate, True
+    bidder_rates = result.bidder_rates
+    below = bidder_rates[bidder_rates < top_rate]
+    return (below.max() if len(below) else np.nan), top_rate, False
+
+
+def evaluate(results, strategies):
+    """공고 x 전략 투찰 사정율 행렬과 판정 구간(하한, 1순위, 실제 예정가격 여부), 전략별 누적 실행 시간."""
+    bids = np.full((len(results), len(strategies)), np.nan)
+    lower = np.full(len(results), np.nan)
+    top = np.full(len(results), np.nan)
+    exact = np.zeros(len(results), dtype=bool)
+    elapsed = np.zeros(len(strategies))
+
+    for i, result in enumerate(results):
+        lower[i], top[i], exact[i] = outcome_bounds(result)
+        for j, strategy in enumerate(strategies):
+            start = time.perf_counter()
+            bids[i, j] = strategy.func(result)
+            elapsed[j] += time.perf_counter() - start
+
+    return bids, lower, top, exact, elapsed
+
+
+def _evaluate_rows(rows, strategies):
+    return evaluate([result for _, result, _, _, _ in rows if result is not None], strategies)
+
+
+def backtest(gongo_nums=None, strategies=None, archive_root=DEFAULT_ARCHIVE_DIR, workers=None, chunk_size=64):
+    """아카이브된 공고들로 전략을 평가해 전략별 성적표를 돌려준다. 재계산/분산은 replay.map_chunks 를 쓴다."""
+    strategies = strategies or default_strategies()
+    parts = map_chunks(partial(_evaluate_rows, strategies=strategies), gongo_nums,
+                       archive_root=archive_root, workers=workers, chunk_size=chunk_size)
+
+    if not parts:
+        empty = np.empty(0)
+        return report(np.empty((0, len(strategies))), empty, empty, np.empty(0, dtype=bool), np.zeros(len(strategies)), strategies)
+    bids = np.concatenate([p[0] for p in parts])
+    lower = np.concatenate([p[1] for p in parts])
+    top = np.concatenate([p[2] for p in parts])
+    exact = np.concatenate([p[3] for p in parts])
+    elapsed = np.sum([p[4] for p in parts], axis=0)
+    return report(bids, lower, top, exact, elapsed, strategies)
+
+
+def report(bids, lower, top, exact, elapsed, strategies):
+    judged = np.isfinite(lower) & np.isfinite(top)
+    valid = judged[:, None] & np.isfinite(bids)
+    wins = valid & (bids >= lower[:, None]) & (bids < top[:, None])
+    distance = np.where(valid, bids - top[:, None], np.nan)
+
+    # 낙찰 판정은 실제 예정가격이 있는 공고만. 추정 하한으로 판정한 공고는 따로 센다.
+    exact_valid = valid & exact[:, None]
+    estimated_valid = valid & ~exact[:, None]
+    n_exact = exact_valid.sum(axis=0)
+    n_wins = (wins & exact[:, None]).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return pd.DataFrame({
+            "전략": [s.name for s in strategies],
+            "평가공고수": n_exact,
+            "낙찰수": n_wins,
+            "낙찰률": np.where(n_exact > 0, n_wins / np.maximum(n_exact, 1), np.nan),
+            "추정공고수": estimated_valid.sum(axis=0),
+            "추정낙찰수": (wins & ~exact[:, None]).sum(axis=0),
+            "1순위거리_평균절대": np.nanmean(np.abs(distance), axis=0) if len(distance) else np.nan,
+            "1순위거리_중앙값": np.nanmedian(distance, axis=0) if len(distance) else np.nan,
+            "실행시간_초": elapsed,
+        })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="아카이브된 공고로 투찰 전략을 백테스트합니다.")
+    parser.add_argument("gongo_nums", nargs="*", help="대상 공고번호 (생략하면 아카이브 전체)")
+    parser.add_argument("--archive", default=DEFAULT_ARCHIVE_DIR, help="아카이브 경로")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="프로세스에 한 번에 넘기는 공고 수")
+    parser.add_argument("--scaling", action="store_true", help="프로세스 수 1, 2, 4, ... 별 처리 시간을 비교")
+    parser.add_argument("-o", "--output", default=None, help="성적표 CSV 저장 경로")
+    args = parser.parse_args(argv)
+    gongo_nums = args.gongo_nums or None
+
+    if args.scaling:
+        max_workers = args.workers or os.cpu_count()
+        counts = sorted({1, max_workers} | {2 ** i for i in range(max_workers.bit_length()) if 2 ** i <= max_workers})
+        base = None
+        for workers in counts:
+            start = time.perf_counter()
+            backtest(gongo_nums, archive_root=args.archive, workers=workers, chunk_size=args.chunk_size)
+            elapsed = time.perf_counter() - start
+            base = base or elapsed
+            print(f"프로세스 {workers:>3}개: {elapsed:8.2f}초 (x{base / elapsed:.2f})")
+        return
+
+    start = time.perf_counter()
+    table = backtest(gongo_nums, archive_root=args.archive, workers=args.workers, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        table.to_csv(args.output, index=False, encoding='utf-8-sig')
+    print(table.to_string(index=False))
+    print(f"전체 {elapsed:.2f}초, 프로세스 {args.workers or os.cpu_count()}개")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import argparse
+import os
+import re
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from arrow_frames import bidder_table
+from result_store import UNKNOWN_BIDDER
+
+# ▶ 업체별 사정율 역색인
+# 공고를 분석할 때마다 개찰 업체의 (공고번호, 사정율, 순위) 를 업체명/사업자번호 기준으로 쌓아 둔다.
+# SQLite 파일 하나에 저장하며, 업체명/사업자번호 인덱스로 조회한다. 업체는 사업자번호로 구분한다 (없으면 업체명).
+# 같은 공고를 다시 분석하면 그 공고의 기록을 새 결과로 바꾼다.
+# 화면에 매번 보이는 누적 건수(stats)는 전체 스캔 대신 add() 에서 갱신하는 카운터 행을 읽는다.
+#
+#   python bidder_index.py build                # 아카이브 전체로 색인 (재)구축
+#   python bidder_index.py history 대명포장중기   # 최근 사정율 이력
+#   python bidder_index.py common 업체A 업체B     # 모두 참여한 공고
+
+DEFAULT_INDEX_PATH = os.environ.get("GONGO_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "bidder_index.sqlite3"))
+
+# 업체 식별자(bidder_key)는 사업자번호, 없으면 '업체명:<업체명>'. 상호가 같은 다른 업체를 한 공고 안에서도 구분한다.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS postings (
+    gongo_num  TEXT NOT NULL,
+    bidder_key TEXT NOT NULL,
+    company    TEXT NOT NULL,
+    bizno      TEXT NOT NULL DEFAULT '',
+    rate       REAL NOT NULL,
+    rank       INTEGER NOT NULL,
+    indexed_at TEXT NOT NULL,
+    PRIMARY KEY (gongo_num, bidder_key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_company ON postings (company, gongo_num);
+CREATE INDEX IF NOT EXISTS postings_bizno ON postings (bizno, gongo_num);
+CREATE TABLE IF NOT EXISTS bidder_counts (
+    bidder_key TEXT PRIMARY KEY,
+    n          INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS counters (
+    id        INTEGER PRIMARY KEY CHECK (id = 0),
+    notices   INTEGER NOT NULL,
+    companies INTEGER NOT NULL,
+    postings  INTEGER NOT NULL
+);
+"""
+
+_BIZNO_PATTERN = re.compile(r"^\d{3}-?\d{2}-?\d{5}$")
+
+
+def is_bizno(key):
+    return bool(_BIZNO_PATTERN.match(key.strip()))
+
+
+def _normalize_bizno(key):
+    return key.strip().replace('-', '')
+
+
+def _bidder_key(company, bizno):
+    return bizno or f"업체명:{company}"
+
+
+class BidderIndex:
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("BEGIN IMMEDIATE")
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(postings)")]
+            if columns and 'bidder_key' not in columns:
+                self._migrate_company_key(conn)
+            for statement in _SCHEMA.split(';'):
+                conn.execute(statement)
+            if conn.execute("SELECT 1 FROM counters").fetchone() is None:
+                # 카운터가 없던 색인 파일이면 한 번만 전체 스캔으로 채운다
+                conn.execute("DELETE FROM bidder_counts")
+                conn.execute("INSERT INTO bidder_counts SELECT bidder_key, COUNT(*) FROM postings GROUP BY bidder_key")
+                conn.execute(
+                    "INSERT INTO counters SELECT 0, COUNT(DISTINCT gongo_num), (SELECT COUNT(*) FROM bidder_counts), COUNT(*) FROM postings"
+                )
+            conn.commit()
+
+    @staticmethod
+    def _migrate_company_key(conn):
+        """업체명을 키로 쓰던 색인 파일을 bidder_key 스키마로 옮긴다 (카운터는 다시 채운다)."""
+        for statement in ("DROP INDEX IF EXISTS postings_company", "DROP INDEX IF EXISTS postings_bizno",
+                          "DROP TABLE IF EXISTS company_counts", "DROP TABLE IF EXISTS counters",
+                          "ALTER TABLE postings RENAME TO postings_old"):
+            conn.execute(statement)
+        for statement in _SCHEMA.split(';'):
+            conn.execute(statement)
+        conn.execute(
+            "INSERT OR IGNORE INTO postings SELECT gongo_num, CASE WHEN bizno != '' THEN bizno ELSE '업체명:' || company END, "
+            "company, bizno, rate, rank, indexed_at FROM postings_old ORDER BY rate"
+        )
+        conn.execute("DROP TABLE postings_old")
+
+    def _connect(self):
+        # 세션 스레드마다 연결을 새로 연다 (sqlite3 연결은 스레드 간 공유하지 않는다)
+        return sqlite3.connect(self.path, timeout=30)
+
+    def add(self, result):
+        """CompactResult 한 건의 업체 사정율을 색인한다 (기존 기록은 교체)."""
+        # 업체 행은 arrow_frames.bidder_table 의 고정 스키마(업체명, 사업자번호, 순위, rate)로 받는다
+        table = bidder_table(result)
+        names = pc.cast(table['업체명'], pa.string())
+        # 업체명도 사업자번호도 없는 행은 업체별로 묶을 수 없으므로 색인하지 않는다
+        identified = pc.or_(pc.not_equal(names, UNKNOWN_BIDDER), pc.not_equal(table['사업자번호'], ''))
+        table = table.set_column(0, '업체명', names).filter(identified)
+        indexed_at = datetime.now().isoformat(timespec='seconds')
+        rows = []
+        for row in table.to_pylist():
+            bizno = _normalize_bizno(row['사업자번호'])
+            rows.append((result.gongo_num, _bidder_key(row['업체명'], bizno), row['업체명'], bizno, row['rate'], row['순위'], indexed_at))
+        with closing(self._connect()) as conn, conn:
+            # 기존 기록 조회부터 카운터 갱신까지 다른 세션/프로세스와 섞이지 않도록 쓰기 잠금을 먼저 잡는다
+            conn.execute("BEGIN IMMEDIATE")
+            old = [row[0] for row in conn.execute("SELECT bidder_key FROM postings WHERE gongo_num = ?", (result.gongo_num,))]
+            conn.execute("DELETE FROM postings WHERE gongo_num = ?", (result.gongo_num,))
+            # 같은 업체가 한 공고에 두 번 나오면 사정율이 낮은 행을 남긴다 (행은 사정율 오름차순)
+            conn.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            new = [row[0] for row in conn.execute("SELECT bidder_key FROM postings WHERE gongo_num = ?", (result.gongo_num,))]
+            self._update_counters(conn, old, new)
+        return len(new)
+
+    @staticmethod
+    def _update_counters(conn, old, new):
+        touched = list(set(old) | set(new))
+        counts = {}
+        for i in range(0, len(touched), 500):
+            chunk = touched[i:i + 500]
+            counts.update(conn.execute(
+                f"SELECT bidder_key, n FROM bidder_counts WHERE bidder_key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall())
+        before = sum(1 for key in touched if counts.get(key, 0) > 0)
+        for key in old:
+            counts[key] = counts.get(key, 0) - 1
+        for key in new:
+            counts[key] = counts.get(key, 0) + 1
+        after = sum(1 for key in touched if counts[key] > 0)
+
+        conn.executemany("DELETE FROM bidder_counts WHERE bidder_key = ?", [(k,) for k in touched if counts[k] <= 0])
+        conn.executemany("INSERT OR REPLACE INTO bidder_counts VALUES (?, ?)", [(k, counts[k]) for k in touched if counts[k] > 0])
+        conn.execute(
+            "UPDATE counters SET notices = notices + ?, companies = companies + ?, postings = postings + ? WHERE id = 0",
+            (bool(new) - bool(old), after - before, len(new) - len(old)),
+        )
+
+    def add_many(self, results):
+        return sum(self.add(result) for result in results)
+
+    def history(self, key, limit=500):
+        """업체명 또는 사업자번호의 최근 사정율 이력 (공고번호 내림차순)."""
+        column, value = ('bizno', _normalize_bizno(key)) if is_bizno(key) else ('company', key.strip())
+        with closing(self._connect()) as conn:
+            return pd.read_sql_query(
+                f"SELECT gongo_num AS 공고번호, company AS 업체명, bizno AS 사업자번호, rate AS 사정율, rank AS 순위 "
+                f"FROM postings WHERE {column} = ? ORDER BY gongo_num DESC LIMIT ?",
+                conn, params=(value, limit),
+            )
+
+    def common_notices(self, keys):
+        """주어진 업체들이 모두 참여한 공고번호 (내림차순)."""
+        keys = [key for key in dict.fromkeys(k.strip() for k in keys) if key]
+        if not keys:
+            return []
+        clauses, params = [], []
+        for key in keys:
+            if is_bizno(key):
+                clauses.append("SELECT gongo_num FROM postings WHERE bizno = ?")
+                params.append(_normalize_bizno(key))
+            else:
+                clauses.append("SELECT gongo_num FROM postings WHERE company = ?")
+                params.append(key)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(" INTERSECT ".join(clauses) + " ORDER BY gongo_num DESC", params).fetchall()
+        return [row[0] for row in rows]
+
+    def rates(self, exclude_gongo=None, limit=100_000):
+        """최근 공고(공고번호 내림차순)의 업체 사정율 표본. exclude_gongo 공고는 뺀다. 반환: (사정율 배열, 공고 수)."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT gongo_num, rate FROM postings WHERE gongo_num != ? ORDER BY gongo_num DESC LIMIT ?",
+                (exclude_gongo or '', limit),
+            ).fetchall()
+        return np.array([row[1] for row in rows], dtype=np.float64), len({row[0] for row in rows})
+
+    def stats(self):
+        with closing(self._connect()) as conn:
+            notices, companies, postings = conn.execute("SELECT notices, companies, postings FROM counters WHERE id = 0").fetchone()
+        return {"notices": notices, "companies": companies, "postings": postings}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="업체별 사정율 역색인을 만들고 조회합니다.")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="색인 파일 경로")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="아카이브 전체로 색인 구축")
+    build.add_argument("--archive", default=None, help="아카이브 경로")
+    build.add_argument("--workers", type=int, default=None, help="프로세스 수")
+    history = sub.add_parser("history", help="업체 사정율 이력")
+    history.add_argument("key", help="업체명 또는 사업자번호")
+    history.add_argument("--limit", type=int, default=500)
+    common = sub.add_parser("common", help="모두 참여한 공고")
+    common.add_argument("keys", nargs="+", help="업체명 또는 사업자번호")
+    args = parser.parse_args(argv)
+
+    index = BidderIndex(args.index)
+    start = time.perf_counter()
+    if args.command == "build":
+        from replay import replay
+        from archive import DEFAULT_ARCHIVE_DIR
+        rows = replay(archive_root=args.archive or DEFAULT_ARCHIVE_DIR, workers=args.workers)
+        n_postings = index.add_many(result for _, result, _, _, _ in rows if result is not None)
+        print(f"공고 {len(rows)}건, 업체 기록 {n_postings}건 색인")
+    elif args.command == "history":
+        print(index.history(args.key, limit=args.limit).to_string(index=False))
+    else:
+        print("\n".join(index.common_notices(args.keys)))
+    print(f"{time.perf_counter() - start:.3f}초")
+
+
+if __name__ == "__main__":
+    main()
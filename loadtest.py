@@ -0,0 +1,270 @@
+import argparse
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# ▶ 다중 세션 부하 테스트
+# mock_api.py 를 별도 프로세스로, app.py 를 `streamlit run` 서버 한 대로 띄운 뒤
+# 브라우저 대신 웹소켓(/_stcore/stream) 클라이언트 N개를 동시에 붙여
+# 실제 흐름 (페이지 로드 → 공고번호 입력 + 🚀 분석 시작 → 결과 렌더 → 표 너비 변경) 을 재현한다.
+# 모든 세션이 한 서버 프로세스(GIL, 캐시, 공유 결과 저장소, 블로킹 API 호출)를 함께 쓰므로 실제 배포와 같은 조건이다.
+#
+# - interact 단계는 표 너비 selectbox 변경이다. 브라우저처럼 그 위젯의 fragment_id 를 실어 보내므로 fragment 재실행 시간이다.
+# - CPU/RSS 는 서버 프로세스의 값이다 (리눅스 /proc 기준, 없으면 NaN).
+# - 클라이언트는 Streamlit 이 의존하는 websockets 패키지와 Streamlit 의 protobuf 메시지(BackMsg/ForwardMsg)를 쓴다.
+#
+#   python loadtest.py --concurrency 1 2 4 8 --latency 0.3
+#   python loadtest.py --concurrency 4 8 --shared-notices   # 모든 세션이 같은 공고 (캐시 적중)
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+STEPS = ["load", "analyze", "interact"]
+NARROW_WIDTH = "고정(좁게)"
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _run_mock(port, latency, jitter):
+    from mock_api import serve
+    serve(port, latency, jitter).serve_forever()
+
+
+# ▶ 서버 프로세스 CPU/RSS (/proc)
+def _cpu_seconds(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")  # utime + stime
+    except OSError:
+        return np.nan
+
+
+def _rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return np.nan
+
+
+def start_server(workdir, port, env):
+    """app.py 를 headless streamlit 서버로 띄우고 health 응답을 기다린다."""
+    # st.secrets 는 작업 디렉터리의 .streamlit/secrets.toml 을 읽는다
+    os.makedirs(os.path.join(workdir, ".streamlit"), exist_ok=True)
+    with open(os.path.join(workdir, ".streamlit", "secrets.toml"), "w") as f:
+        f.write('SERVICE_KEY = "loadtest"\n')
+    log = open(os.path.join(workdir, "streamlit.log"), "wb")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH,
+         "--server.headless", "true", "--server.port", str(port),
+         "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return server
+        except OSError:
+            if server.poll() is not None:
+                break
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"streamlit 서버가 뜨지 않았습니다 (로그: {log.name})")
+
+
+# ▶ 웹소켓 세션 (브라우저 대역)
+class Session:
+    """Streamlit 프론트엔드처럼 BackMsg 를 보내고 스크립트 실행이 끝날 때까지 ForwardMsg 를 읽는다."""
+
+    def __init__(self, port, timeout):
+        from websockets.sync.client import connect
+        self.timeout = timeout
+        self.ws = connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"],
+                          max_size=None, open_timeout=timeout, legacy=True)
+        self.widget_states = {}  # 위젯 id -> (값 종류, 값)
+        self.widgets = {}        # 사용자 key -> (위젯 id, fragment_id)
+
+    def close(self):
+        self.ws.close()
+
+    def widget_id(self, key):
+        if key not in self.widgets:
+            raise RuntimeError(f"위젯이 렌더되지 않았습니다: {key}")
+        return self.widgets[key]
+
+    def rerun(self, triggers=(), fragment_id=""):
+        """현재 위젯 값(+ 이번에 누른 버튼)으로 재실행을 요청하고 끝날 때까지 기다린다."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.fragment_id = fragment_id
+        for widget_id, (value_type, value) in self.widget_states.items():
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            setattr(state, value_type, value)
+        for widget_id in triggers:
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            state.trigger_value = True
+        self.ws.send(msg.SerializeToString())
+        self._wait_finished(fragment=bool(fragment_id))
+
+    def _wait_finished(self, fragment):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        done = ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY if fragment else ForwardMsg.FINISHED_SUCCESSFULLY
+        deadline = time.monotonic() + self.timeout
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(self.ws.recv(timeout=max(0.0, deadline - time.monotonic())))
+            kind = msg.WhichOneof("type")
+            if kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type == "exception":
+                    raise RuntimeError(element.exception.message)
+                widget_id = getattr(getattr(element, element_type), "id", "")
+                if widget_id.startswith("$$ID-"):
+                    # 위젯 id 형식: $$ID-<해시>-<사용자 key>
+                    self.widgets[widget_id.split("-", 2)[2]] = (widget_id, msg.delta.fragment_id)
+            elif kind == "script_finished":
+                if msg.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("app.py 컴파일 오류")
+                # st.rerun() 으로 끊긴 실행(FINISHED_EARLY_FOR_RERUN)은 이어지는 재실행을 기다린다
+                if msg.script_finished == done:
+                    return
+
+
+def run_session(port, gongo_nums, timeout):
+    """세션 하나의 단계별 소요 시간 (초)."""
+    timings = {}
+    start = time.perf_counter()
+    session = Session(port, timeout)
+    try:
+        session.rerun()
+        timings["load"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        input_id, _ = session.widget_id("gongo_input_area")
+        button_id, _ = session.widget_id("start_analysis_button")
+        session.widget_states[input_id] = ("string_value", "\n".join(gongo_nums))
+        session.rerun(triggers=[button_id])
+        timings["analyze"] = time.perf_counter() - start
+        session.widget_id("download_button_key")
+
+        start = time.perf_counter()
+        width_id, fragment_id = session.widget_id("display_width")
+        session.widget_states[width_id] = ("string_value", NARROW_WIDTH)
+        session.rerun(fragment_id=fragment_id)
+        timings["interact"] = time.perf_counter() - start
+    finally:
+        session.close()
+    return timings
+
+
+def run_level(server_pid, port, concurrency, sessions, notice_sets, timeout):
+    """동시 세션 수 하나에 대한 측정. 세션은 모두 같은 서버 프로세스에 붙는다."""
+    cpu_start = _cpu_seconds(server_pid)
+    peak_rss = [_rss_mb(server_pid)]
+    stop = threading.Event()
+
+    def sample_rss():
+        while not stop.wait(0.2):
+            peak_rss.append(_rss_mb(server_pid))
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+
+    wall_start = time.perf_counter()
+    errors = []
+    rows = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(run_session, port, notice_sets[i % len(notice_sets)], timeout) for i in range(sessions)]
+        for future in futures:
+            try:
+                rows.append(future.result())
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+    wall = time.perf_counter() - wall_start
+    stop.set()
+    sampler.join()
+
+    summary = {"동시세션": concurrency, "세션수": sessions, "실패": len(errors)}
+    for step in STEPS + ["total"]:
+        values = np.array([sum(r.values()) if step == "total" else r[step] for r in rows])
+        summary[f"{step}_p50"] = np.percentile(values, 50) if len(values) else np.nan
+        summary[f"{step}_p99"] = np.percentile(values, 99) if len(values) else np.nan
+    summary["처리량_세션/초"] = len(rows) / wall
+    summary["서버CPU_초"] = _cpu_seconds(server_pid) - cpu_start
+    summary["서버CPU_사용률"] = summary["서버CPU_초"] / wall
+    summary["서버RSS_MB_최대"] = np.nanmax(peak_rss) if not np.all(np.isnan(peak_rss)) else np.nan
+    return summary, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="로컬 API 대역과 streamlit 서버 한 대로 app.py 다중 세션 부하 테스트")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8], help="동시 세션 수 목록")
+    parser.add_argument("--sessions-per-level", type=int, default=None, help="단계별 세션 수 (기본: 동시 세션 수 x 2)")
+    parser.add_argument("--notices", type=int, default=10, help="세션당 공고 수 (1~10)")
+    parser.add_argument("--shared-notices", action="store_true", help="모든 세션이 같은 공고를 분석 (캐시 적중)")
+    parser.add_argument("--latency", type=float, default=0.2, help="API 응답 지연 (초)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="API 지연 편차 (초)")
+    parser.add_argument("--timeout", type=float, default=300, help="단계 하나의 제한 시간 (초)")
+    parser.add_argument("-o", "--output", default=None, help="결과 CSV 저장 경로")
+    args = parser.parse_args(argv)
+
+    mock_port, app_port = _free_port(), _free_port()
+    mock = multiprocessing.Process(target=_run_mock, args=(mock_port, args.latency, args.jitter), daemon=True)
+    mock.start()
+    workdir = tempfile.mkdtemp(prefix="gongo-loadtest-")
+    # 서버가 API 대역과 임시 아카이브/색인을 쓰도록 환경변수로 넘긴다
+    env = dict(
+        os.environ,
+        GONGO_API_BASE=f"http://127.0.0.1:{mock_port}",
+        GONGO_ARCHIVE_DIR=os.path.join(workdir, "archive"),
+        GONGO_INDEX_PATH=os.path.join(workdir, "bidder_index.sqlite3"),
+    )
+
+    rows = []
+    server = start_server(workdir, app_port, env)
+    try:
+        for level, concurrency in enumerate(args.concurrency):
+            sessions = args.sessions_per_level or concurrency * 2
+            n_sets = 1 if args.shared_notices else sessions
+            # 단계마다 다른 공고번호를 써서 이전 단계의 캐시/아카이브/색인 상태와 섞이지 않게 한다
+            notice_sets = [[f"2099{level:02d}{s:03d}{n:02d}" for n in range(args.notices)] for s in range(n_sets)]
+            summary, errors = run_level(server.pid, app_port, concurrency, sessions, notice_sets, args.timeout)
+            rows.append(summary)
+            print(f"동시 {concurrency}: p50 {summary['total_p50']:.2f}초, p99 {summary['total_p99']:.2f}초, "
+                  f"서버 CPU {summary['서버CPU_사용률']:.0%}, 서버 RSS {summary['서버RSS_MB_최대']:.0f}MB, 실패 {len(errors)}")
+            for error in errors[:3]:
+                print(f"  ❌ {error}")
+    finally:
+        server.terminate()
+        server.wait()
+        mock.terminate()
+
+    table = pd.DataFrame(rows)
+    if args.output:
+        table.to_csv(args.output, index=False, encoding='utf-8-sig')
+    with pd.option_context("display.width", 200, "display.max_columns", None, "display.float_format", "{:.3f}".format):
+        print(table.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
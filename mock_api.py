@@ -0,0 +1,153 @@
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+# ▶ data.go.kr 네 엔드포인트(+ 공고 목록 조회)의 로컬 대역
+# 공고번호로 시드를 정해 항상 같은 응답을 만든다. 응답 지연(latency/jitter)을 설정할 수 있다.
+#
+#   python mock_api.py --port 8765 --latency 0.3
+#   GONGO_API_BASE=http://127.0.0.1:8765 streamlit run app.py
+
+N_PREPAR = 15
+N_DRAWN = 4
+
+
+def _notice(gongo_nm):
+    rnd = random.Random(gongo_nm)
+    base_price = rnd.randrange(100_000_000, 5_000_000_000, 1000)
+    lwlt_rate = rnd.choice([86.745, 87.745, 87.995, 89.745])
+    prepar = [int(base_price * (0.98 + 0.04 * rnd.random())) for _ in range(N_PREPAR)]
+    drawn = set(rnd.sample(range(N_PREPAR), N_DRAWN))
+    costs = {col: str(rnd.randrange(0, base_price // 100)) for col in ('sftyMngcst', 'rtrfundNon', 'npnInsrprm', 'qltyMngcst')}
+    return rnd, base_price, lwlt_rate, prepar, drawn, costs
+
+
+def _json_items(items):
+    return json.dumps({
+        "response": {
+            "header": {"resultCode": "00", "resultMsg": "정상"},
+            "body": {"items": items, "numOfRows": len(items), "pageNo": 1, "totalCount": len(items)},
+        }
+    }, ensure_ascii=False)
+
+
+def notice_list_body(begin, end, per_day=20):
+    """등록일시 구간(inqryBgnDt~inqryEndDt)의 공사 공고 목록. 개찰일은 등록일 7일 뒤."""
+    day = datetime.strptime(begin[:8], "%Y%m%d")
+    last = datetime.strptime(end[:8], "%Y%m%d")
+    items = []
+    while day <= last:
+        for i in range(per_day):
+            opening = day + timedelta(days=7, hours=10 + i % 6)
+            items.append({"bidNtceNo": f"{day:%y%m%d}{i:05d}", "bidNtceOrd": "00", "bidNtceNm": f"테스트 공사 {i}",
+                          "opengDt": f"{opening:%Y-%m-%d %H:%M:%S}"})
+        day += timedelta(days=1)
+    return _json_items(items)
+
+
+def prepar_body(gongo_nm):
+    _, base_price, _, prepar, drawn, _ = _notice(gongo_nm)
+    return _json_items([
+        {"bidNtceNo": gongo_nm, "compnoRsrvtnPrceSno": str(i + 1), "bssamt": str(base_price), "bsisPlnprc": str(price),
+         "drwtYn": "Y" if i in drawn else "N"}
+        for i, price in enumerate(prepar)
+    ])
+
+
+def lwlt_body(gongo_nm):
+    _, _, lwlt_rate, _, _, _ = _notice(gongo_nm)
+    return _json_items([{"bidNtceNo": gongo_nm, "sucsfbidLwltRate": str(lwlt_rate)}])
+
+
+def bsis_body(gongo_nm):
+    _, _, _, _, _, costs = _notice(gongo_nm)
+    return _json_items([dict(bidNtceNo=gongo_nm, **costs)])
+
+
+def opengcompt_body(gongo_nm, n_bidders=None):
+    rnd, base_price, lwlt_rate, prepar, drawn, costs = _notice(gongo_nm)
+    n_bidders = n_bidders or rnd.randrange(50, 400)
+    planned = sum(prepar[i] for i in drawn) / N_DRAWN
+    # 낙찰하한 금액 = (예정가격 - A값) x 낙찰하한율 + A값. A값은 bsis_body 가 내려주는 금액의 합이다.
+    a_value = sum(int(cost) for cost in costs.values())
+    lower_limit = (planned - a_value) * lwlt_rate / 100 + a_value
+    bids = sorted((int(lower_limit * (0.99 + 0.02 * rnd.random())), i) for i in range(n_bidders))
+    valid = [b for b in bids if b[0] >= lower_limit] + [b for b in bids if b[0] < lower_limit]
+    items = "".join(
+        f"<item><opengRank>{rank}</opengRank><prcbdrBizno>{1000000000 + i}</prcbdrBizno>"
+        f"<prcbdrNm>{escape(f'업체{i:04d}')}</prcbdrNm><bidprcAmt>{amount}</bidprcAmt></item>"
+        for rank, (amount, i) in enumerate(valid, start=1)
+    )
+    return ("<?xml version=\"1.0\" encoding=\"UTF-8\"?><response><header><resultCode>00</resultCode>"
+            f"<resultMsg>NORMAL SERVICE.</resultMsg></header><body><items>{items}</items></body></response>")
+
+
+ROUTES = {
+    "getOpengResultListInfoCnstwkPreparPcDetail": (prepar_body, "application/json"),
+    "getBidPblancListInfoCnstwk": (lwlt_body, "application/json"),
+    "getBidPblancListInfoCnstwkBsisAmount": (bsis_body, "application/json"),
+    "getOpengResultListInfoOpengCompt": (opengcompt_body, "text/xml"),
+}
+
+
+def make_handler(latency=0.0, jitter=0.0):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            route = ROUTES.get(url.path.rsplit('/', 1)[-1])
+            query = parse_qs(url.query)
+            gongo_nm = query.get('bidNtceNo', [''])[0]
+            is_list = route is ROUTES["getBidPblancListInfoCnstwk"] and query.get('inqryDiv') == ['1']
+            if route is None or not (gongo_nm or is_list):
+                self.send_error(404)
+                return
+            time.sleep(max(0.0, latency + random.uniform(-jitter, jitter)))
+            body, content_type = route
+            if is_list:
+                data = notice_list_body(query['inqryBgnDt'][0], query['inqryEndDt'][0]).encode('utf-8')
+            else:
+                data = body(gongo_nm).encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", f"{content_type}; charset=UTF-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=8765, latency=0.0, jitter=0.0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency, jitter))
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(port=0, latency=0.0, jitter=0.0):
+    """백그라운드 스레드로 띄우고 (server, base_url) 을 돌려준다."""
+    server = serve(port, latency, jitter)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="data.go.kr 조달청 API 로컬 대역")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="응답 지연 (초)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="지연 편차 (초, ±)")
+    args = parser.parse_args(argv)
+    server = serve(args.port, args.latency, args.jitter)
+    print(f"http://127.0.0.1:{server.server_address[1]} (지연 {args.latency}±{args.jitter}초)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+from collections import namedtuple
+
+import numpy as np
+
+# ▶ 투찰 금액별 낙찰 확률 최적화
+# 실제 예정가격 사정율 a 는 복수예가 조합 사정율 중 하나가 같은 확률로 뽑힌다고 본다.
+# 사정율 r 로 투찰하면 a <= r 일 때 낙찰하한 이상이 되고, [a, r) 안에 다른 업체가 없으면 1순위가 된다.
+#
+# - 관측 업체 (n_competitors=None): 경쟁 업체 사정율이 정해져 있으므로
+#   r 바로 아래 업체 사정율 c 에 대해 P(낙찰) = P(c < a <= r)
+# - 과거 분포 (n_competitors=N): 경쟁자 N명이 표본 분포에서 독립적으로 뽑힌다고 보고
+#   P(낙찰) = 평균_a<=r (1 - F[a, r))^N
+#
+# 후보 금액 격자 전체를 searchsorted 와 행렬 연산 한 번으로 계산한다.
+
+MAX_DISTRIBUTION_POINTS = 2048  # 과거 분포 표본이 이보다 많으면 분위수로 줄인다
+
+Optimization = namedtuple('Optimization', ['bid_amounts', 'rates', 'win_prob', 'best_bid', 'best_rate', 'best_prob'])
+
+
+def bid_to_rate(bid_amounts, base_price, lwlt_rate, a_value):
+    """투찰 금액 -> 사정율 (analyze_raw 의 사정율 계산식)."""
+    return (((np.asarray(bid_amounts, dtype=np.float64) - a_value) * 100) / lwlt_rate + a_value) * 100 / base_price
+
+
+def rate_to_bid(rates, base_price, lwlt_rate, a_value):
+    """사정율 -> 투찰 금액 (bid_to_rate 의 역함수)."""
+    return (np.asarray(rates, dtype=np.float64) * base_price / 100 - a_value) * lwlt_rate / 100 + a_value
+
+
+def win_probability(rates, combo_rates, competitor_rates, n_competitors=None):
+    """투찰 사정율 배열 각각의 낙찰 확률."""
+    rates = np.asarray(rates, dtype=np.float64)
+    combos = np.sort(np.asarray(combo_rates, dtype=np.float64))
+    competitors = np.sort(np.asarray(competitor_rates, dtype=np.float64))
+    competitors = competitors[np.isfinite(competitors)]
+    if len(combos) == 0:
+        return np.zeros(len(rates))
+
+    n_at_or_below = np.searchsorted(combos, rates, side='right')
+
+    if n_competitors is None:
+        below = np.searchsorted(competitors, rates, side='left')
+        nearest_below = np.where(below > 0, competitors[np.maximum(below - 1, 0)], -np.inf)
+        return (n_at_or_below - np.searchsorted(combos, nearest_below, side='right')) / len(combos)
+
+    if len(competitors) == 0 or n_competitors == 0:
+        return n_at_or_below / len(combos)
+    if len(competitors) > MAX_DISTRIBUTION_POINTS:
+        competitors = np.quantile(competitors, np.linspace(0, 1, MAX_DISTRIBUTION_POINTS))
+
+    # 경쟁자 표본 기준 '구간 번호' L(x) = (x 보다 작은 표본 수). [a, r) 의 표본 비율은 (L(r) - L(a)) / m.
+    m = len(competitors)
+    combo_levels = np.searchsorted(competitors, combos, side='left')
+    rate_levels = np.searchsorted(competitors, rates, side='left')
+    level_counts = np.bincount(combo_levels, minlength=m + 1)
+
+    # 더 낮은 구간의 조합은 모두 a < r 이므로 구간 거리 d 에 대해 (1 - d/m)^N 가중 합을 미리 구한다.
+    weights = (1.0 - np.arange(m + 1) / m) ** n_competitors
+    weights[0] = 0.0
+    lower_levels = np.convolve(level_counts, weights)[:m + 1]
+    # 같은 구간의 조합은 a <= r 인 것만 [a, r) 에 경쟁자가 없으므로 확률 1
+    same_level = n_at_or_below - np.concatenate([[0], np.cumsum(level_counts)])[rate_levels]
+    return (lower_levels[rate_levels] + same_level) / len(combos)
+
+
+def optimize_bid(result, competitor_rates=None, n_competitors=None, n_points=2001, unit=1):
+    """공고 하나에 대해 후보 투찰 금액 격자의 낙찰 확률 곡선과 최적 금액.
+
+    competitor_rates 를 생략하면 해당 공고의 개찰 업체 사정율을 쓴다.
+    후보 금액은 조합 사정율 범위를 unit 원 단위로 나눈 격자다.
+    """
+    combo_rates = result.combo_rates
+    if competitor_rates is None:
+        competitor_rates = result.bidder_rates
+    params = (result.base_price, result.lwlt_rate, result.a_value)
+    if len(combo_rates) == 0 or not all(np.isfinite(params)) or result.base_price == 0 or result.lwlt_rate == 0:
+        empty = np.empty(0)
+        return Optimization(empty, empty, empty, np.nan, np.nan, 0.0)
+
+    low, high = rate_to_bid([combo_rates[0], combo_rates[-1]], *params)
+    bid_amounts = np.unique(np.ceil(np.linspace(low, high, n_points) / unit) * unit)
+    rates = bid_to_rate(bid_amounts, *params)
+    win_prob = win_probability(rates, combo_rates, competitor_rates, n_competitors)
+
+    best = int(np.argmax(win_prob))
+    return Optimization(bid_amounts, rates, win_prob, bid_amounts[best], rates[best], win_prob[best])
@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import requests
+
+from analysis import API_BASE, HEADERS, LiveFetcher, analyze_raw
+from archive import DEFAULT_ARCHIVE_DIR, ArchiveFetcher, CachedFetcher, ResponseArchive, is_fresh
+from bidder_index import DEFAULT_INDEX_PATH, BidderIndex
+
+# ▶ 개찰일 공고 미리 받기 (별도 프로세스)
+# 오늘/내일 개찰하는 공사 공고를 찾아, 낙찰하한율/A값은 미리, 복수예가/개찰결과는 개찰 시각 이후 주기적으로 받아
+# 공유 아카이브(= app.py 의 캐시)에 채워 둔다. 네 응답이 모두 채워지면 업체 사정율 색인에도 넣는다.
+#
+#   SERVICE_KEY=... python prefetch.py                 # 계속 실행
+#   python prefetch.py --once                          # 한 번만 (cron 등)
+
+NOTICE_LIST_URL = '{api_base}/1230000/ad/BidPublicInfoService/getBidPblancListInfoCnstwk?inqryDiv=1&inqryBgnDt={begin}&inqryEndDt={end}&pageNo={page}&numOfRows={rows}&type=json&ServiceKey={service_key}'
+PRE_OPENING_ENDPOINTS = ('lwlt', 'bsis')          # 공고 시점부터 있는 응답
+POST_OPENING_ENDPOINTS = ('prepar', 'opengcompt')  # 개찰 후에 채워지는 응답
+SECRETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".streamlit", "secrets.toml")
+
+
+def log(message):
+    print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {message}", flush=True)
+
+
+def load_service_key():
+    """환경변수 SERVICE_KEY, 없으면 .streamlit/secrets.toml 의 SERVICE_KEY."""
+    service_key = os.environ.get("SERVICE_KEY")
+    if not service_key and os.path.exists(SECRETS_PATH):
+        import tomllib
+        with open(SECRETS_PATH, 'rb') as f:
+            service_key = tomllib.load(f).get("SERVICE_KEY")
+    return (service_key or "").strip()
+
+
+def discover(service_key, now=None, lookback_days=14, rows=999, session=requests):
+    """최근 lookback_days 일 동안 등록된 공사 공고 중 오늘/내일 개찰하는 것 {공고번호: 개찰일시}."""
+    now = now or datetime.now()
+    begin = (now - timedelta(days=lookback_days)).strftime("%Y%m%d0000")
+    end = now.strftime("%Y%m%d%H%M")
+    target_days = {now.date(), (now + timedelta(days=1)).date()}
+
+    notices = {}
+    page, seen = 1, 0
+    while True:
+        url = NOTICE_LIST_URL.format(api_base=API_BASE, begin=begin, end=end, page=page, rows=rows, service_key=service_key)
+        res = session.get(url, headers=HEADERS, timeout=60)
+        if res.status_code != 200:
+            raise Exception(f"API 호출 실패 (공고 목록): HTTP {res.status_code}")
+        body = json.loads(res.content).get('response', {}).get('body', {})
+        items = body.get('items') or []
+        if isinstance(items, dict):
+            items = items.get('item') or []
+        if not isinstance(items, list):
+            items = [items]
+
+        for item in items:
+            try:
+                opening = datetime.strptime(item.get('opengDt', ''), "%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                continue
+            if opening.date() in target_days:
+                notices[item['bidNtceNo']] = opening
+
+        seen += len(items)
+        if not items or seen >= int(body.get('totalCount') or 0):
+            return notices
+        page += 1
+
+
+class Prefetcher:
+    def __init__(self, service_key, archive, bidder_index=None, rate=5.0, give_up=timedelta(hours=6)):
+        self.archive = archive
+        self.fetch = CachedFetcher(archive, LiveFetcher(service_key, archive=archive))
+        self.bidder_index = bidder_index
+        self.min_interval = 1.0 / rate if rate > 0 else 0.0
+        self.give_up = give_up
+        self.notices = {}   # 공고번호 -> 개찰일시
+        self.done = set()
+        self._last_request = 0.0
+
+    def track(self, notices):
+        new = {gongo_nm: opening for gongo_nm, opening in notices.items() if gongo_nm not in self.notices}
+        self.notices.update(notices)
+        return len(new)
+
+    def _get(self, gongo_nm, endpoint):
+        # data.go.kr 일일 호출 한도를 나눠 쓰도록 요청 간격을 둔다
+        wait = self._last_request + self.min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_request = time.monotonic()
+        return self.fetch(gongo_nm, endpoint)
+
+    def warm(self, now=None):
+        """추적 중인 공고를 한 바퀴 돌며 오래됐거나 비어 있는 응답을 받는다. 받은 요청 수를 돌려준다."""
+        now = now or datetime.now()
+        n_requests = 0
+        for gongo_nm, opening in sorted(self.notices.items(), key=lambda item: item[1]):
+            if gongo_nm in self.done:
+                continue
+            if now > opening + self.give_up:
+                log(f"공고번호 {gongo_nm}: 개찰 후 {self.give_up} 동안 결과가 없어 추적 중단")
+                self.done.add(gongo_nm)
+                continue
+
+            endpoints = PRE_OPENING_ENDPOINTS + (POST_OPENING_ENDPOINTS if now >= opening else ())
+            manifest = self.archive.manifest(gongo_nm)
+            for endpoint in endpoints:
+                if is_fresh(endpoint, manifest.get(endpoint), now):
+                    continue
+                try:
+                    self._get(gongo_nm, endpoint)
+                    n_requests += 1
+                except Exception as e:
+                    log(f"공고번호 {gongo_nm} ({endpoint}) 요청 실패: {e}")
+
+            manifest = self.archive.manifest(gongo_nm)
+            if all((manifest.get(endpoint) or {}).get("complete") for endpoint in PRE_OPENING_ENDPOINTS + POST_OPENING_ENDPOINTS):
+                self._finish(gongo_nm)
+        return n_requests
+
+    def _finish(self, gongo_nm):
+        self.done.add(gongo_nm)
+        result, error, top_bidder, _ = analyze_raw(gongo_nm, ArchiveFetcher(self.archive))
+        if result is not None and self.bidder_index is not None:
+            self.bidder_index.add(result)
+        log(f"공고번호 {gongo_nm}: 캐시 완료 (1순위 {top_bidder['name']} {top_bidder['rate']}){f' - {error}' if error else ''}")
+
+    def run(self, service_key, discover_interval=timedelta(minutes=30), poll_interval=timedelta(minutes=5), lookback_days=14, once=False):
+        last_discovery = None
+        while True:
+            now = datetime.now()
+            if last_discovery is None or now - last_discovery >= discover_interval:
+                try:
+                    n_new = self.track(discover(service_key, now, lookback_days))
+                    log(f"오늘/내일 개찰 공고 {len(self.notices)}건 추적 중 (신규 {n_new}건)")
+                except Exception as e:
+                    log(f"공고 목록 조회 실패: {e}")
+                last_discovery = now
+
+            n_requests = self.warm(now)
+            pending = len(self.notices) - len(self.done)
+            log(f"요청 {n_requests}건, 대기 공고 {pending}건")
+            if once:
+                return
+            time.sleep(poll_interval.total_seconds())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="오늘/내일 개찰 공고의 응답을 미리 받아 공유 캐시(아카이브)를 채웁니다.")
+    parser.add_argument("--archive", default=DEFAULT_ARCHIVE_DIR, help="아카이브 경로 (app.py 와 같은 곳)")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="업체 사정율 색인 경로")
+    parser.add_argument("--rate", type=float, default=5.0, help="초당 최대 요청 수")
+    parser.add_argument("--lookback-days", type=int, default=14, help="공고 목록을 조회할 등록일 범위 (일)")
+    parser.add_argument("--discover-minutes", type=float, default=30, help="공고 목록 재조회 주기 (분)")
+    parser.add_argument("--poll-minutes", type=float, default=5, help="응답 갱신 주기 (분)")
+    parser.add_argument("--give-up-hours", type=float, default=6, help="개찰 후 결과를 기다리는 최대 시간 (시간)")
+    parser.add_argument("--once", action="store_true", help="한 바퀴만 돌고 종료")
+    args = parser.parse_args(argv)
+
+    service_key = load_service_key()
+    if not service_key:
+        raise SystemExit("SERVICE_KEY 환경변수 또는 .streamlit/secrets.toml 에 SERVICE_KEY 가 필요합니다.")
+
+    prefetcher = Prefetcher(
+        service_key,
+        ResponseArchive(args.archive),
+        bidder_index=BidderIndex(args.index),
+        rate=args.rate,
+        give_up=timedelta(hours=args.give_up_hours),
+    )
+    prefetcher.run(
+        service_key,
+        discover_interval=timedelta(minutes=args.discover_minutes),
+        poll_interval=timedelta(minutes=args.poll_minutes),
+        lookback_days=args.lookback_days,
+        once=args.once,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from result_store import NO_BIDDER, NO_COMBO
+
+# ▶ 공고별 사정율 정렬 색인
+# 조합 사정율과 업체 사정율을 각각 정렬된 배열로 들고 searchsorted 로 조회한다.
+# 구간/최근접/순위 조회 모두 O(log n) (+ 결과 크기) 이라 표 크기와 무관하다.
+# Streamlit 없이 쓸 수 있으며, CLI 는 아카이브에 저장된 공고를 재계산해서 조회한다.
+#
+#   python rate_index.py 20230123456 --between 99.8 100.2
+#   python rate_index.py 20230123456 --nearest
+
+
+class RateIndex:
+    def __init__(self, result):
+        # CompactResult.rates 는 이미 오름차순이므로 마스크만으로 정렬 배열이 된다
+        is_combo = result.combo_ids != NO_COMBO
+        is_bidder = result.bidder_codes != NO_BIDDER
+        self.gongo_num = result.gongo_num
+        self.combo_rates = result.rates[is_combo]
+        self.combo_ids = result.combo_ids[is_combo]
+        self.bidder_rates = result.rates[is_bidder]
+        self.bidder_names = np.array(result.bidder_names, dtype=object)[result.bidder_codes[is_bidder]]
+        self.top_bidder_name = result.top_bidder_name
+        self.top_bidder_rate = result.top_bidder_rate
+
+    def combos_between(self, low, high):
+        """low <= 사정율 <= high 인 조합 (조합순번, 사정율)."""
+        start = np.searchsorted(self.combo_rates, low, side='left')
+        stop = np.searchsorted(self.combo_rates, high, side='right')
+        return self.combo_ids[start:stop], self.combo_rates[start:stop]
+
+    def count_between(self, low, high):
+        return int(np.searchsorted(self.combo_rates, high, side='right') - np.searchsorted(self.combo_rates, low, side='left'))
+
+    def _bidder_slice(self, low, high):
+        start = np.searchsorted(self.bidder_rates, low, side='left') if low is not None else 0
+        stop = np.searchsorted(self.bidder_rates, high, side='right') if high is not None else len(self.bidder_rates)
+        return slice(start, stop)
+
+    def bidders_between(self, low, high):
+        rows = self._bidder_slice(low, high)
+        return self.bidder_names[rows], self.bidder_rates[rows]
+
+    def nearest_combos(self, rates):
+        """각 사정율 바로 아래(<)/위(>=) 조합의 위치. 없으면 -1 / len."""
+        rates = np.asarray(rates, dtype=np.float64)
+        above = np.searchsorted(self.combo_rates, rates, side='left')
+        return above - 1, above
+
+    def combo_rank(self, rates):
+        """조합 중 순위: 사정율보다 낮은 조합 수 + 1."""
+        return np.searchsorted(self.combo_rates, np.asarray(rates, dtype=np.float64), side='left') + 1
+
+    def top_bidder_combo_rank(self):
+        if not isinstance(self.top_bidder_rate, float):
+            return None
+        return int(self.combo_rank(self.top_bidder_rate))
+
+    def bidder_neighbours(self, low=None, high=None):
+        """업체별 바로 아래/위 조합과 조합 중 순위 표. low/high 를 주면 그 구간의 업체만 (정렬 배열을 잘라서) 만든다."""
+        rows = self._bidder_slice(low, high)
+        bidder_names, bidder_rates = self.bidder_names[rows], self.bidder_rates[rows]
+        below, above = self.nearest_combos(bidder_rates)
+        # 범위 밖(-1 / len)은 끝 원소를 가리키게 한 뒤 가린다 (분석 결과에는 조합이 항상 있다)
+        has_below = below >= 0
+        has_above = above < len(self.combo_rates)
+        below_idx = np.clip(below, 0, len(self.combo_rates) - 1)
+        above_idx = np.clip(above, 0, len(self.combo_rates) - 1)
+        return pd.DataFrame({
+            '업체명': bidder_names,
+            '사정율': bidder_rates,
+            '조합순위': above + 1,
+            '아래_조합순번': np.where(has_below, self.combo_ids[below_idx], 0),
+            '아래_조합사정율': np.where(has_below, self.combo_rates[below_idx], np.nan),
+            '위_조합순번': np.where(has_above, self.combo_ids[above_idx], 0),
+            '위_조합사정율': np.where(has_above, self.combo_rates[above_idx], np.nan),
+        })
+
+
+_indexes = weakref.WeakKeyDictionary()
+
+
+def rate_index_for(result):
+    """결과 객체별로 한 번만 만든다 (공유 저장소의 결과는 세션 간 같은 객체)."""
+    index = _indexes.get(result)
+    if index is None:
+        index = _indexes[result] = RateIndex(result)
+    return index
+
+
+def main(argv=None):
+    from analysis import analyze_raw
+    from archive import DEFAULT_ARCHIVE_DIR, ArchiveFetcher, ResponseArchive
+
+    parser = argparse.ArgumentParser(description="아카이브된 공고의 사정율 구간/최근접 조회")
+    parser.add_argument("gongo_nm", help="공고번호")
+    parser.add_argument("--archive", default=DEFAULT_ARCHIVE_DIR, help="아카이브 경로")
+    parser.add_argument("--between", nargs=2, type=float, metavar=("LOW", "HIGH"), help="조합 사정율 구간")
+    parser.add_argument("--nearest", action="store_true", help="업체별 바로 아래/위 조합")
+    args = parser.parse_args(argv)
+
+    result, error, _, _ = analyze_raw(args.gongo_nm, ArchiveFetcher(ResponseArchive(args.archive)))
+    if result is None:
+        raise SystemExit(error)
+    index = rate_index_for(result)
+
+    print(f"공고번호 {args.gongo_nm}: 조합 {len(index.combo_rates)}개, 업체 {len(index.bidder_rates)}곳, "
+          f"1순위 조합 중 순위 {index.top_bidder_combo_rank()}")
+    if args.between:
+        combo_ids, combo_rates = index.combos_between(*args.between)
+        print(pd.DataFrame({'조합순번': combo_ids, '사정율': combo_rates}).to_string(index=False))
+    if args.nearest:
+        print(index.bidder_neighbours().to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from analysis import analyze_raw
+from archive import DEFAULT_ARCHIVE_DIR, ArchiveFetcher, ResponseArchive
+
+# ▶ 아카이브 재생 엔진
+# 보관된 원본 응답으로 analyze_raw 를 다시 돌린다. 네트워크를 쓰지 않으며 공고 단위로 CPU 코어에 분산한다.
+#
+#   python replay.py                       # 아카이브 전체 재계산, 요약 CSV 출력
+#   python replay.py --workers 8 -o out.csv 20230123456 20230123457
+
+
+def _replay_chunk(archive_root, gongo_nums, per_chunk=None):
+    fetch = ArchiveFetcher(ResponseArchive(archive_root))
+    rows = [(gongo_nm,) + analyze_raw(gongo_nm, fetch) for gongo_nm in gongo_nums]
+    return per_chunk(rows) if per_chunk is not None else rows
+
+
+def map_chunks(per_chunk=None, gongo_nums=None, archive_root=DEFAULT_ARCHIVE_DIR, workers=None, chunk_size=64):
+    """아카이브된 공고를 청크로 나눠 병렬로 재계산하고, 청크별 행 목록에 per_chunk 를 워커 안에서 적용한다.
+
+    per_chunk 는 피클 가능해야 한다 (모듈 함수 또는 functools.partial). 반환: 청크 순서대로 per_chunk 결과 목록.
+    """
+    if gongo_nums is None:
+        gongo_nums = ResponseArchive(archive_root).gongo_nums()
+    gongo_nums = list(gongo_nums)
+    chunks = [gongo_nums[i:i + chunk_size] for i in range(0, len(gongo_nums), chunk_size)]
+
+    if workers == 1 or len(chunks) <= 1:
+        return [_replay_chunk(archive_root, chunk, per_chunk) for chunk in chunks]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_replay_chunk, [archive_root] * len(chunks), chunks, [per_chunk] * len(chunks)))
+
+
+def replay(gongo_nums=None, archive_root=DEFAULT_ARCHIVE_DIR, workers=None, chunk_size=64):
+    """아카이브된 공고를 병렬로 재계산한다.
+
+    반환: [(공고번호, CompactResult 또는 None, 오류 메시지, 1순위 정보, 경고 목록), ...] (입력 순서 유지)
+    """
+    parts = map_chunks(None, gongo_nums, archive_root=archive_root, workers=workers, chunk_size=chunk_size)
+    return [row for rows in parts for row in rows]
+
+
+def summarize(rows):
+    """재계산 결과 요약표 (공고별 한 행)."""
+    return pd.DataFrame([
+        {
+            "공고번호": gongo_nm,
+            "조합수": int((result.combo_ids > 0).sum()) if result is not None else 0,
+            "업체수": int((result.bidder_codes >= 0).sum()) if result is not None else 0,
+            "1순위": top_bidder["name"],
+            "1순위_사정율": top_bidder["rate"],
+            "오류": error or "",
+            "경고": " / ".join(warnings),
+        }
+        for gongo_nm, result, error, top_bidder, warnings in rows
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="아카이브된 원본 응답으로 사정율 분석을 일괄 재계산합니다.")
+    parser.add_argument("gongo_nums", nargs="*", help="재계산할 공고번호 (생략하면 아카이브 전체)")
+    parser.add_argument("--archive", default=DEFAULT_ARCHIVE_DIR, help="아카이브 경로")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("-o", "--output", default=None, help="요약 CSV 저장 경로")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    rows = replay(args.gongo_nums or None, archive_root=args.archive, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(rows)
+    if args.output:
+        summary.to_csv(args.output, index=False, encoding='utf-8-sig')
+    else:
+        print(summary.to_string(index=False))
+    n_errors = int((summary["오류"] != "").sum()) if not summary.empty else 0
+    print(f"재계산 {len(rows)}건 (오류 {n_errors}건), {elapsed:.2f}초, 프로세스 {args.workers or os.cpu_count()}개")
+
+
+if __name__ == "__main__":
+    main()
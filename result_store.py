@@ -0,0 +1,211 @@
+import hashlib
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# ▶ 공고별 분석 결과의 압축 표현
+# 기존에는 세션마다 (rate, 업체명, 공고번호, 강조_업체명) object 컬럼 DataFrame 을 통째로 들고 있었다.
+# 여기서는 rate 는 float64 배열, 조합순번은 int16, 업체명은 카테고리 코드로만 들고,
+# 화면/병합/내보내기용 테이블은 필요할 때 arrow_frames 에서 만든다.
+
+NO_BIDDER = -1  # 조합 행의 업체 코드
+NO_COMBO = 0    # 업체 행의 조합순번
+UNKNOWN_BIDDER = "(업체명 없음)"  # 개찰결과에 업체명이 빠진 행의 이름
+
+
+def _readonly(arr, dtype):
+    arr = np.ascontiguousarray(arr, dtype=dtype)
+    arr.flags.writeable = False
+    return arr
+
+
+@dataclass(frozen=True, eq=False)
+class CompactResult:
+    gongo_num: str
+    key: str                   # 공고번호 + 내용 해시 (같은 내용이면 세션이 달라도 같은 키)
+    rates: np.ndarray          # float64, 오름차순 정렬, 소수 5자리 반올림
+    combo_ids: np.ndarray      # int16, 조합순번 1..N (업체 행은 NO_COMBO)
+    bidder_codes: np.ndarray   # int16, bidder_names 인덱스 (조합 행은 NO_BIDDER)
+    bidder_names: tuple        # 카테고리 (등장 순서)
+    top_bidder_name: str
+    top_bidder_rate: object    # float 또는 "범위 외"/"N/A"
+    base_price: float = np.nan    # 기초금액
+    lwlt_rate: float = np.nan     # 낙찰하한율
+    a_value: float = np.nan       # A값
+    actual_rate: float = np.nan   # 추첨된 복수예가로 정해진 실제 예정가격 사정율 (개찰 전이면 NaN)
+    # 사업자번호/순위는 행 단위로 든다 (상호가 같은 다른 업체가 한 공고에 있을 수 있으므로 업체명 카테고리에 묶지 않는다)
+    bidder_biznos: tuple = ()     # 사업자등록번호 카테고리 (없으면 '')
+    bizno_codes: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int16))   # int16, 행별 bidder_biznos 인덱스 (조합 행은 NO_BIDDER)
+    bidder_ranks: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int16))  # int16, 행별 개찰 순위 (조합 행은 0)
+
+    @classmethod
+    def build(cls, gongo_num, combo_rates, bidder_names, bidder_rates, top_bidder,
+              base_price=np.nan, lwlt_rate=np.nan, a_value=np.nan, actual_rate=np.nan,
+              bidder_biznos=None, bidder_ranks=None):
+        combo_rates = np.asarray(combo_rates, dtype=np.float64)
+        bidder_rates = np.asarray(bidder_rates, dtype=np.float64)
+        # 업체명이 빠진 행은 factorize 코드가 -1(= NO_BIDDER)이 되어 조합 행처럼 보이므로 이름을 채워 둔다
+        codes, categories = pd.factorize(pd.Series(bidder_names, dtype=object).fillna(UNKNOWN_BIDDER), sort=False)
+        if bidder_biznos is None:
+            bidder_biznos = [''] * len(bidder_rates)
+        bizno_codes, bizno_categories = pd.factorize(pd.Series(bidder_biznos, dtype=object).fillna('').astype(str), sort=False)
+        bidder_ranks = np.zeros(len(bidder_rates), dtype=np.int64) if bidder_ranks is None else np.asarray(bidder_ranks, dtype=np.int64)
+        if len(combo_rates) > np.iinfo(np.int16).max or len(categories) > np.iinfo(np.int16).max:
+            raise ValueError("조합/업체 수가 압축 표현 범위를 넘습니다.")
+
+        rates = np.concatenate([combo_rates, bidder_rates])
+        combo_ids = np.concatenate([np.arange(1, len(combo_rates) + 1), np.full(len(bidder_rates), NO_COMBO)])
+        bidder_codes = np.concatenate([np.full(len(combo_rates), NO_BIDDER), codes])
+        bizno_codes = np.concatenate([np.full(len(combo_rates), NO_BIDDER), bizno_codes])
+        ranks = np.concatenate([np.zeros(len(combo_rates), dtype=np.int64), bidder_ranks])
+
+        order = np.argsort(rates, kind='stable')
+        rates = np.round(rates[order], 5)
+        combo_ids = combo_ids[order]
+        bidder_codes = bidder_codes[order]
+        bizno_codes = bizno_codes[order]
+        ranks = ranks[order]
+        names = tuple(str(name) for name in categories)
+        biznos = tuple(str(bizno) for bizno in bizno_categories)
+
+        digest = hashlib.blake2b(digest_size=8)
+        for part in (rates, combo_ids.astype(np.int16), bidder_codes.astype(np.int16), bizno_codes.astype(np.int16), ranks.astype(np.int16)):
+            digest.update(part.tobytes())
+        digest.update("\x1f".join(names + ('\x1e',) + biznos).encode('utf-8'))
+        digest.update(f"{top_bidder['name']}\x1f{top_bidder['rate']}".encode('utf-8'))
+        digest.update(np.array([base_price, lwlt_rate, a_value, actual_rate], dtype=np.float64).tobytes())
+
+        return cls(
+            gongo_num=str(gongo_num),
+            key=f"{gongo_num}:{digest.hexdigest()}",
+            rates=_readonly(rates, np.float64),
+            combo_ids=_readonly(combo_ids, np.int16),
+            bidder_codes=_readonly(bidder_codes, np.int16),
+            bidder_names=names,
+            top_bidder_name=top_bidder['name'],
+            top_bidder_rate=top_bidder['rate'],
+            base_price=float(base_price),
+            lwlt_rate=float(lwlt_rate),
+            a_value=float(a_value),
+            actual_rate=float(actual_rate),
+            bidder_biznos=biznos,
+            bizno_codes=_readonly(bizno_codes, np.int16),
+            bidder_ranks=_readonly(ranks, np.int16),
+        )
+
+    @property
+    def top_bidder(self):
+        return {"name": self.top_bidder_name, "rate": self.top_bidder_rate}
+
+    @property
+    def combo_rates(self):
+        return self.rates[self.combo_ids != NO_COMBO]
+
+    @property
+    def bidder_rates(self):
+        return self.rates[self.bidder_codes != NO_BIDDER]
+
+    @property
+    def bidders(self):
+        """업체명 카테고리 (조합 행은 NaN)."""
+        return pd.Categorical.from_codes(self.bidder_codes, categories=list(self.bidder_names))
+
+    def __len__(self):
+        return len(self.rates)
+
+    def labels(self):
+        """조합 행은 조합순번 문자열, 업체 행은 업체명."""
+        names = np.array(self.bidder_names + ('',), dtype=object)
+        labels = names[self.bidder_codes]  # NO_BIDDER(-1) -> ''
+        is_combo = self.combo_ids != NO_COMBO
+        labels[is_combo] = self.combo_ids[is_combo].astype(str)
+        return labels
+
+    @property
+    def nbytes(self):
+        arrays = self.rates.nbytes + self.combo_ids.nbytes + self.bidder_codes.nbytes + self.bizno_codes.nbytes + self.bidder_ranks.nbytes
+        return arrays + sum(sys.getsizeof(name) for name in self.bidder_names + self.bidder_biznos)
+
+    def legacy_nbytes(self):
+        """기존 세션 저장 방식(object 컬럼 4개 DataFrame)으로 들고 있었을 때의 크기."""
+        labels = self.labels()
+        legacy = pd.DataFrame({
+            'rate': self.rates,
+            '업체명': labels,
+            '공고번호': np.full(len(self), self.gongo_num, dtype=object),
+            '강조_업체명': labels.copy(),
+        })
+        return int(legacy.memory_usage(deep=True).sum())
+
+
+# ▶ 세션 간 공유 저장소
+# 같은 공고를 여러 분석자가 조회해도 CompactResult 는 한 벌만 두고, 세션은 참조만 보관한다.
+# 결과는 불변이므로 세션 간 공유해도 안전하다.
+class ResultHolder:
+    """결과를 들고 있는 세션 하나의 표식. 세션이 사라지면 약한 참조라서 저장소 집계에서도 빠진다."""
+
+
+class ResultStore:
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> [CompactResult, legacy_nbytes, 누적 요청 수]
+        self._holders = weakref.WeakKeyDictionary()  # ResultHolder -> 지금 들고 있는 결과 키 집합
+        self._lock = threading.Lock()
+
+    def intern(self, result):
+        """같은 키의 결과가 있으면 기존 객체를, 없으면 등록 후 그 객체를 돌려준다."""
+        with self._lock:
+            entry = self._entries.get(result.key)
+            if entry is not None:
+                entry[2] += 1
+                self._entries.move_to_end(result.key)
+                return entry[0]
+
+        legacy_nbytes = result.legacy_nbytes()
+        with self._lock:
+            entry = self._entries.setdefault(result.key, [result, legacy_nbytes, 0])
+            entry[2] += 1
+            self._entries.move_to_end(result.key)
+            while len(self._entries) > self.max_entries:
+                # 내보낸 결과도 이미 참조 중인 세션에서는 그대로 쓸 수 있다.
+                self._entries.popitem(last=False)
+            return entry[0]
+
+    def hold(self, holder, results):
+        """세션(holder)이 지금 들고 있는 결과 목록을 바꾼다. 처음으로/재분석 시 이전 목록은 빠진다."""
+        with self._lock:
+            self._holders[holder] = {result.key for result in results}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry is not None else None
+
+    def stats(self):
+        """저장소 메모리 사용량.
+
+        legacy_bytes 는 지금 결과를 들고 있는 세션마다 DataFrame 을 복사해 두던 기존 방식의 추정치다.
+        requests 는 누적 조회 수로, 메모리 계산에는 쓰지 않는다.
+        """
+        with self._lock:
+            entries = list(self._entries.items())
+            holdings = list(self._holders.values())
+        copies = {}
+        for keys in holdings:
+            for key in keys:
+                copies[key] = copies.get(key, 0) + 1
+        compact_bytes = sum(result.nbytes for _, (result, _, _) in entries)
+        legacy_bytes = sum(legacy * copies.get(key, 0) for key, (_, legacy, _) in entries)
+        return {
+            "entries": len(entries),
+            "sessions": len(holdings),
+            "requests": sum(requests for _, (_, _, requests) in entries),
+            "compact_bytes": compact_bytes,
+            "legacy_bytes": legacy_bytes,
+            "saved_bytes": legacy_bytes - compact_bytes,
+        }